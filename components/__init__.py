@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pulumi
+
+# The program is split into four layers, each a ComponentResource:
+# networking, data, messaging and the web tier. A stack deploys the layers in
+# its `layers` config (all four by default, as a single stack) and reads the
+# outputs of the other layers from the stacks named in `layer_stacks`, so
+# e.g. web tier updates only touch the web tier stack.
+
+LAYER_NAMES = ("networking", "data", "messaging", "web")
+
+# Resource Tag
+common_tag = {"Name": "my-pulumi-infra"}
+common_tag_low = {k.lower(): v for k, v in common_tag.items()}
+
+_stack_references = {}
+
+
+class Layer(pulumi.ComponentResource):
+    # Outputs other layers consume. Every layer exports them under the same
+    # names, so a StackReference to its stack can stand in for the component.
+    OUTPUTS = ()
+
+    def __init__(self, type_name, name, opts=None):
+        super().__init__(f"iac-pulumi:layers:{type_name}", name, None, opts)
+        self.exports = {}
+
+    def child_opts(self, **kwargs):
+        # The resources were created at the top level before the program was
+        # split into layers; the alias keeps their URNs, so existing stacks
+        # adopt them without replacing anything
+        return pulumi.ResourceOptions(parent=self,
+                                      aliases=[pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)],
+                                      **kwargs)
+
+    def finish(self, **exports):
+        # Stack outputs of the layer: the OUTPUTS plus any extra ones
+        self.exports = {**{name: getattr(self, name) for name in self.OUTPUTS}, **exports}
+        self.register_outputs(self.exports)
+
+
+def referenced_layer(layer_class, stack_name):
+    """Return the OUTPUTS of a layer deployed by another stack."""
+    if stack_name not in _stack_references:
+        _stack_references[stack_name] = pulumi.StackReference(stack_name)
+    reference = _stack_references[stack_name]
+    return SimpleNamespace(**{name: reference.get_output(name) for name in layer_class.OUTPUTS})
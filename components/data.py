@@ -0,0 +1,333 @@
+import json
+
+import pulumi
+import pulumi_aws as aws
+from pulumi_aws import ec2, iam, rds
+
+import db_tuning
+from components import Layer, common_tag
+
+config = pulumi.Config()
+
+
+class Data(Layer):
+    """The database (RDS MySQL or Aurora Serverless v2), its read replicas and optional RDS Proxy."""
+
+    OUTPUTS = ("db_host", "db_read_hosts")
+
+    def __init__(self, name, network, opts=None):
+        super().__init__("Data", name, opts)
+
+        # Optional RDS Proxy pooling the web tier's database connections
+        rds_proxy_enabled = config.get_bool("rds_proxy") or False
+        db_client_security_groups = [network.application_sg_id]
+
+        if rds_proxy_enabled:
+            # RDS Proxy Security Group
+            rds_proxy_sg = ec2.SecurityGroup("rdsProxySecurityGroup",
+                                             vpc_id=network.vpc_id,
+                                             description="Security group for the RDS proxy",
+                                             ingress=[
+                                                 ec2.SecurityGroupIngressArgs(
+                                                     protocol="tcp",
+                                                     from_port=3306,
+                                                     to_port=3306,
+                                                     security_groups=[network.application_sg_id])
+                                             ],
+                                             egress=[
+                                                 ec2.SecurityGroupEgressArgs(
+                                                     protocol="tcp", from_port=3306, to_port=3306, cidr_blocks=[network.vpc_cidr]),
+                                             ],
+                                             tags={**common_tag, "Type": "rdsProxySecurityGroup"},
+                                             opts=self.child_opts())
+            db_client_security_groups.append(rds_proxy_sg.id)
+
+        # Database Security Group
+        db_security_group = ec2.SecurityGroup("databaseSecurityGroup",
+                                              vpc_id=network.vpc_id,
+                                              description="Security group for RDS instances",
+                                              egress=[
+                                                ec2.SecurityGroupEgressArgs(
+                                                    protocol="-1", from_port=0, to_port=0, cidr_blocks=["0.0.0.0/0"]),
+                                                ],
+                                              ingress=[
+                                                ec2.SecurityGroupIngressArgs(
+                                                    protocol="tcp",
+                                                    from_port=3306,  # For MySQL/MariaDB
+                                                    to_port=3306,
+                                                    security_groups=db_client_security_groups
+                                                  )
+                                              ],
+                                              tags={**common_tag, "Type": "databaseSecurityGroup"},
+                                              opts=self.child_opts())
+
+        # RDS Subnet Group
+        rds_subnet_group = rds.SubnetGroup("db-subnet-group",
+                                           subnet_ids=network.data_subnets,
+                                           description="RDS subnet group using private subnets",
+                                           tags={**common_tag, "Type": "RDSSubnetGroup"},
+                                           opts=self.child_opts()
+                                           )
+
+        # Database engine: "mysql" runs a single RDS instance, "aurora-serverless" an
+        # Aurora MySQL cluster with Serverless v2 scaling between aurora_min_capacity
+        # and aurora_max_capacity ACUs. Both serve the same database to the web tier.
+        db_engine = config.get("db_engine") or "mysql"
+        if db_engine not in ("mysql", "aurora-serverless"):
+            raise ValueError(f"Unknown db_engine {db_engine}, expected 'mysql' or 'aurora-serverless'")
+
+        # Number of read replicas (Aurora reader instances), spread across the private subnet AZs
+        db_read_replica_count = config.get_int("db_read_replicas") or 0
+        db_instance_class = config.get("db_instance_class") or "db.t2.micro"
+
+        # Database storage: gp3 with storage autoscaling up to db_max_allocated_storage GB.
+        # gp3 volumes under 400 GB get a fixed 3000 IOPS and 125 MiB/s baseline; IOPS
+        # and throughput can only be raised from 400 GB up.
+        db_storage_type = config.get("db_storage_type") or "gp3"
+        db_allocated_storage = config.get_int("db_allocated_storage") or 25
+        db_max_allocated_storage = config.get_int("db_max_allocated_storage") or 100
+        db_storage_iops = config.get_int("db_storage_iops")
+        db_storage_throughput = config.get_int("db_storage_throughput")
+        if (db_storage_iops or db_storage_throughput) and (db_storage_type != "gp3" or db_allocated_storage < 400):
+            raise ValueError("db_storage_iops and db_storage_throughput require gp3 storage of at least 400 GB")
+
+        # Named MySQL tuning profile (balanced, read_heavy or write_heavy), computed from the instance class
+        db_tuning_profile = config.get("db_tuning_profile") or "balanced"
+        db_charset_parameters = [
+            {
+                "name": "character_set_server",
+                "value": "utf8"
+            },
+            {
+                "name": "character_set_client",
+                "value": "utf8"
+            }
+        ]
+
+        # Replica i goes to the i-th AZ, wrapping around
+        def replica_az(i):
+            return pulumi.Output.from_input(network.availability_zones).apply(lambda names: names[i % len(names)])
+
+        if db_engine == "mysql":
+            # RDS Parameter Group
+            db_parameter_group = rds.ParameterGroup("custom-db-parameter-group",
+                                                    family="mysql8.0",
+                                                    description="Custom parameter group for RDS",
+                                                    parameters=[
+                                                        *db_charset_parameters,
+                                                        *db_tuning.tuning_parameters(db_instance_class,
+                                                                                     profile=db_tuning_profile,
+                                                                                     storage_iops=db_storage_iops or 3000)
+                                                    ],
+                                                    tags={**common_tag, "Type": "customDbParameterGroup"},
+                                                    opts=self.child_opts(delete_before_replace=True))
+
+            # RDS Instance
+            rds_instance = rds.Instance("csye6225",
+                                        engine="mysql",
+                                        instance_class=db_instance_class,
+                                        allocated_storage=db_allocated_storage,
+                                        max_allocated_storage=db_max_allocated_storage,
+                                        storage_type=db_storage_type,
+                                        iops=db_storage_iops,
+                                        storage_throughput=db_storage_throughput,
+                                        db_name="csye6225",
+                                        username="csye6225",
+                                        identifier="csye6225",
+                                        password=config.require_secret("database_password"),
+                                        parameter_group_name=db_parameter_group.name,
+                                        skip_final_snapshot=True,
+                                        vpc_security_group_ids=[db_security_group.id],
+                                        db_subnet_group_name=rds_subnet_group.name,
+                                        multi_az=False,
+                                        publicly_accessible=False,
+                                        apply_immediately=True,
+                                        # Replicas need automated backups on the source
+                                        backup_retention_period=(config.get_int("db_backup_retention_days") or 1) if db_read_replica_count else None,
+                                        tags={**common_tag, "Type": "RDSInstance"},
+                                        opts=self.child_opts())
+
+            # RDS Read Replicas
+            db_read_replicas = []
+            for i in range(db_read_replica_count):
+                replica = rds.Instance(f"csye6225-replica-{i + 1}",
+                                       identifier=f"csye6225-replica-{i + 1}",
+                                       replicate_source_db=rds_instance.identifier,
+                                       instance_class=db_instance_class,
+                                       availability_zone=replica_az(i),
+                                       parameter_group_name=db_parameter_group.name,
+                                       vpc_security_group_ids=[db_security_group.id],
+                                       skip_final_snapshot=True,
+                                       publicly_accessible=False,
+                                       apply_immediately=True,
+                                       tags={**common_tag, "Type": "RDSReadReplica"},
+                                       opts=self.child_opts())
+                db_read_replicas.append(replica)
+
+            # Split RDS endpoint to remove port number
+            db_writer_host = rds_instance.endpoint.apply(lambda endpoint: endpoint.split(":")[0])
+            db_reader_hosts = [replica.address for replica in db_read_replicas]
+            replica_lag_metric, replica_lag_unit_factor = "ReplicaLag", 1
+        else:
+            # Aurora Cluster Parameter Group
+            db_cluster_parameter_group = rds.ClusterParameterGroup("custom-db-cluster-parameter-group",
+                                                                   family="aurora-mysql8.0",
+                                                                   description="Custom cluster parameter group for Aurora",
+                                                                   parameters=[
+                                                                       *db_charset_parameters,
+                                                                       *db_tuning.cluster_parameters(db_tuning_profile)
+                                                                   ],
+                                                                   tags={**common_tag, "Type": "customDbClusterParameterGroup"},
+                                                                   opts=self.child_opts())
+
+            # Aurora MySQL Cluster
+            db_cluster = rds.Cluster("csye6225-cluster",
+                                     cluster_identifier="csye6225",
+                                     engine="aurora-mysql",
+                                     engine_mode="provisioned",
+                                     engine_version=config.get("aurora_engine_version") or "8.0.mysql_aurora.3.05.2",
+                                     database_name="csye6225",
+                                     master_username="csye6225",
+                                     master_password=config.require_secret("database_password"),
+                                     db_cluster_parameter_group_name=db_cluster_parameter_group.name,
+                                     db_subnet_group_name=rds_subnet_group.name,
+                                     vpc_security_group_ids=[db_security_group.id],
+                                     serverlessv2_scaling_configuration=rds.ClusterServerlessv2ScalingConfigurationArgs(
+                                         min_capacity=config.get_float("aurora_min_capacity") or 0.5,
+                                         max_capacity=config.get_float("aurora_max_capacity") or 4),
+                                     storage_encrypted=True,
+                                     skip_final_snapshot=True,
+                                     apply_immediately=True,
+                                     tags={**common_tag, "Type": "AuroraCluster"},
+                                     opts=self.child_opts())
+
+            # Aurora Writer Instance
+            rds_instance = rds.ClusterInstance("csye6225-writer",
+                                               identifier="csye6225-writer",
+                                               cluster_identifier=db_cluster.id,
+                                               instance_class="db.serverless",
+                                               engine=db_cluster.engine,
+                                               engine_version=db_cluster.engine_version,
+                                               publicly_accessible=False,
+                                               apply_immediately=True,
+                                               tags={**common_tag, "Type": "AuroraWriterInstance"},
+                                               opts=self.child_opts())
+
+            # Aurora Reader Instances
+            db_read_replicas = []
+            for i in range(db_read_replica_count):
+                db_read_replicas.append(rds.ClusterInstance(f"csye6225-replica-{i + 1}",
+                                                            identifier=f"csye6225-replica-{i + 1}",
+                                                            cluster_identifier=db_cluster.id,
+                                                            instance_class="db.serverless",
+                                                            engine=db_cluster.engine,
+                                                            engine_version=db_cluster.engine_version,
+                                                            availability_zone=replica_az(i),
+                                                            publicly_accessible=False,
+                                                            apply_immediately=True,
+                                                            tags={**common_tag, "Type": "AuroraReaderInstance"},
+                                                            opts=self.child_opts(depends_on=[rds_instance])))
+
+            # The cluster endpoints follow the writer across failovers
+            db_writer_host = db_cluster.endpoint
+            db_reader_hosts = [db_cluster.reader_endpoint] if db_read_replicas else []
+            # Aurora reports replica lag in milliseconds
+            replica_lag_metric, replica_lag_unit_factor = "AuroraReplicaLag", 1000
+
+        for i, replica in enumerate(db_read_replicas):
+            # Replica Lag Cloud Watch alarm
+            aws.cloudwatch.MetricAlarm(f"replicaLagAlarm-{i + 1}",
+                                       comparison_operator="GreaterThanThreshold",
+                                       evaluation_periods=5,
+                                       metric_name=replica_lag_metric,
+                                       namespace="AWS/RDS",
+                                       period=60,
+                                       statistic="Maximum",
+                                       threshold=(config.get_int("db_replica_lag_alarm_seconds") or 30) * replica_lag_unit_factor,
+                                       alarm_description=f"Replication lag of csye6225-replica-{i + 1}",
+                                       dimensions={
+                                           "DBInstanceIdentifier": replica.identifier},
+                                       tags={**common_tag, "Type": "replicaLagAlarm"},
+                                       opts=self.child_opts())
+
+        db_host = db_writer_host
+        if rds_proxy_enabled:
+            # Database credentials the proxy authenticates with
+            db_credentials_secret = aws.secretsmanager.Secret("dbCredentialsSecret",
+                                                              description="Database credentials for the RDS proxy",
+                                                              opts=self.child_opts())
+
+            aws.secretsmanager.SecretVersion("dbCredentialsSecretValue",
+                                             secret_id=db_credentials_secret.id,
+                                             secret_string=config.require_secret("database_password").apply(
+                                                 lambda password: json.dumps({"username": "csye6225", "password": password})),
+                                             opts=self.child_opts())
+
+            # IAM Role for the RDS Proxy
+            role_rds_proxy = iam.Role("rdsProxyRole",
+                                      assume_role_policy=json.dumps({
+                                          "Version": "2012-10-17",
+                                          "Statement": [{
+                                              "Action": "sts:AssumeRole",
+                                              "Effect": "Allow",
+                                              "Principal": {
+                                                  "Service": "rds.amazonaws.com"
+                                              }
+                                          }]
+                                      }),
+                                      opts=self.child_opts())
+
+            policy_rds_proxy = iam.RolePolicy("rdsProxySecretPolicy",
+                                              role=role_rds_proxy.id,
+                                              policy=db_credentials_secret.arn.apply(lambda arn: json.dumps({
+                                                  "Version": "2012-10-17",
+                                                  "Statement": [{
+                                                      "Effect": "Allow",
+                                                      "Action": "secretsmanager:GetSecretValue",
+                                                      "Resource": arn
+                                                  }]
+                                              })),
+                                              opts=self.child_opts())
+
+            # RDS Proxy
+            rds_proxy = rds.Proxy("dbProxy",
+                                  name="webapp-db-proxy",
+                                  engine_family="MYSQL",
+                                  role_arn=role_rds_proxy.arn,
+                                  vpc_security_group_ids=[rds_proxy_sg.id],
+                                  vpc_subnet_ids=network.data_subnets,
+                                  auths=[rds.ProxyAuthArgs(
+                                      auth_scheme="SECRETS",
+                                      iam_auth="DISABLED",
+                                      secret_arn=db_credentials_secret.arn
+                                  )],
+                                  idle_client_timeout=config.get_int("rds_proxy_idle_client_timeout") or 1800,
+                                  require_tls=False,
+                                  tags={**common_tag, "Type": "RDSProxy"},
+                                  opts=self.child_opts(depends_on=[policy_rds_proxy]))
+
+            # Connection pool limits, as a percentage of the instance's max_connections
+            rds_proxy_target_group = rds.ProxyDefaultTargetGroup("dbProxyTargetGroup",
+                                                                 db_proxy_name=rds_proxy.name,
+                                                                 connection_pool_config=rds.ProxyDefaultTargetGroupConnectionPoolConfigArgs(
+                                                                     max_connections_percent=config.get_int("rds_proxy_max_connections_percent") or 90,
+                                                                     max_idle_connections_percent=config.get_int("rds_proxy_max_idle_connections_percent") or 50,
+                                                                     connection_borrow_timeout=config.get_int("rds_proxy_connection_borrow_timeout") or 120
+                                                                 ),
+                                                                 opts=self.child_opts())
+
+            rds.ProxyTarget("dbProxyTarget",
+                            db_proxy_name=rds_proxy.name,
+                            target_group_name=rds_proxy_target_group.name,
+                            db_instance_identifier=rds_instance.identifier if db_engine == "mysql" else None,
+                            db_cluster_identifier=db_cluster.cluster_identifier if db_engine != "mysql" else None,
+                            opts=self.child_opts())
+
+            # The web tier connects through the proxy instead
+            db_host = rds_proxy.endpoint
+
+        self.db_host = db_host
+        # Comma-separated hosts for read-only queries; the web tier falls back
+        # to DB_HOST when there are none
+        self.db_read_hosts = pulumi.Output.all(*db_reader_hosts).apply(",".join)
+        self.finish()
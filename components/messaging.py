@@ -0,0 +1,650 @@
+import json
+import os
+
+import pulumi
+import pulumi_aws as aws
+from pulumi_aws import iam, lambda_, sns
+
+import lambda_build
+import lookups
+from components import Layer, common_tag, common_tag_low
+
+config = pulumi.Config()
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Secondary indexes the email tracking table can be queried by: (hash key, range key)
+EMAIL_TRACKING_INDEXES = {
+    "EmailIndex": ("EmailAddress", "SubmittedAt"),
+    "SubmissionDateIndex": ("SubmissionDate", "SubmittedAt"),
+}
+
+
+class Messaging(Layer):
+    """The submission pipeline: SNS topic, optional SQS buffer, Lambda, its secrets and the email tracking table."""
+
+    OUTPUTS = ("sns_topic_arn",)
+
+    def __init__(self, name, opts=None):
+        super().__init__("Messaging", name, opts)
+        account_id = lookups.get_caller_identity().account_id
+        region = lookups.get_region()
+
+        # Fetch configurations
+        mailgun_domain = config.require("mailgun_domain")
+        mailgun_sender = config.require("mailgun_sender")
+        ses_region = config.require("ses_region")
+
+        # Get the Mailgun API key from the config
+        mailgun_api_key_value = config.require_secret("mailgun_api_key")
+
+        # The GCS submission pipeline pulls in the GCP SDK and provider, so stacks
+        # that don't upload to GCS can switch it off
+        enable_gcs_submission = config.get_bool("enable_gcs_submission")
+        if enable_gcs_submission is None:
+            enable_gcs_submission = True
+
+        # Lambda secrets: either one Secrets Manager secret per value, or with
+        # lambda_bundled_secret a single JSON secret the Lambda fetches once per cold start
+        lambda_bundled_secret = config.get_bool("lambda_bundled_secret") or False
+
+        # GCS bucket, service account and the secrets handing them to the Lambda
+        gcs_pipeline = None
+        if enable_gcs_submission:
+            from gcs_submission import create_gcs_submission
+            gcs_pipeline = create_gcs_submission(config.require("gcp_project"), common_tag_low,
+                                                 create_secrets=not lambda_bundled_secret,
+                                                 opts=self.child_opts())
+
+        if lambda_bundled_secret:
+            lambda_config_values = {
+                "dynamodb_table": config.require("dynamo_db_table"),
+                "mailgun_api_key": mailgun_api_key_value,
+                "mailgun_domain": mailgun_domain,
+                "ses_email_identity": mailgun_sender,
+            }
+            if gcs_pipeline:
+                lambda_config_values.update({
+                    "gcs_bucket_name": gcs_pipeline.bucket.name,
+                    "gcp_service_account_key": gcs_pipeline.service_account_key_json,
+                })
+
+            lambda_config_secret = aws.secretsmanager.Secret("lambdaConfigSecret",
+                                                             description="Configuration bundle for the Lambda function",
+                                                             opts=self.child_opts())
+
+            lambda_config_secret_value = aws.secretsmanager.SecretVersion("lambdaConfigSecretValue",
+                                                                          secret_id=lambda_config_secret.id,
+                                                                          secret_string=pulumi.Output.all(**lambda_config_values).apply(
+                                                                              lambda values: json.dumps(values)),
+                                                                          opts=self.child_opts())
+
+            # Secrets the Lambda reads at runtime
+            lambda_secret_arns = [lambda_config_secret.arn]
+
+            # Environment variables handed to the Lambda
+            lambda_environment_variables = {
+                'SES_REGION': ses_region,
+                'LAMBDA_CONFIG_SECRET_ARN': lambda_config_secret.arn,
+            }
+        else:
+            # Secrets for DynamoDB table, SES email identity, and SES domain
+            table_secret_dynamodb = aws.secretsmanager.Secret("DynamoDbTableSecret",
+                                                              description="DynamoDB table name for the email tracking",
+                                                              opts=self.child_opts())
+
+            email_identity_secret_ses = aws.secretsmanager.Secret("SesEmailIdentitySecret",
+                                                                  description="SES email identity for the Lambda function",
+                                                                  opts=self.child_opts())
+
+            domain_secret_ses = aws.secretsmanager.Secret("SesDomainSecret",
+                                                          description="SES domain for the Lambda function",
+                                                          opts=self.child_opts())
+
+            # Secret values
+            table_secret_value_dynamodb = aws.secretsmanager.SecretVersion("DynamoDbTableSecretValue",
+                                                                           secret_id=table_secret_dynamodb.id,
+                                                                           secret_string=config.require("dynamo_db_table"),
+                                                                           opts=self.child_opts())
+
+            email_identity_secret_value_ses = aws.secretsmanager.SecretVersion("SesEmailIdentitySecretValue",
+                                                                               secret_id=email_identity_secret_ses.id,
+                                                                               secret_string=config.require("mailgun_sender"),
+                                                                               opts=self.child_opts())
+
+            domain_secret_value_ses = aws.secretsmanager.SecretVersion("SesDomainSecretValue",
+                                                                       secret_id=domain_secret_ses.id,
+                                                                       secret_string=config.require("mailgun_domain"),
+                                                                       opts=self.child_opts())
+
+            mailgun_api_key_secret = aws.secretsmanager.Secret("mailgunApiKey",
+                                                               description="Mailgun API Key",
+                                                               opts=self.child_opts())
+
+            mailgun_api_key_secret_value = aws.secretsmanager.SecretVersion("mailgunApiKeyValue",
+                                                                            secret_id=mailgun_api_key_secret.id,
+                                                                            secret_string=mailgun_api_key_value,
+                                                                            opts=self.child_opts())
+
+            mailgun_domain_secret = aws.secretsmanager.Secret("mailgunDomain",
+                                                              description="Mailgun Domain",
+                                                              opts=self.child_opts())
+
+            mailgun_domain_secret_value = aws.secretsmanager.SecretVersion("mailgunDomainValue",
+                                                                           secret_id=mailgun_domain_secret.id,
+                                                                           secret_string=config.require("mailgun_domain"),
+                                                                           opts=self.child_opts())
+
+            # Secrets the Lambda reads at runtime
+            lambda_secret_arns = [
+                table_secret_dynamodb.arn,
+                email_identity_secret_ses.arn,
+                domain_secret_ses.arn,
+                mailgun_api_key_secret.arn,
+                mailgun_domain_secret.arn,
+            ]
+
+            # Environment variables handed to the Lambda
+            lambda_environment_variables = {
+                'SES_REGION': ses_region,
+                'DYNAMODB_TABLE_SECRET_ARN': table_secret_dynamodb.arn,
+                'MAILGUN_API_KEY_SECRET_ARN': mailgun_api_key_secret.arn,
+                'MAILGUN_DOMAIN_SECRET_ARN': mailgun_domain_secret.arn,
+                'SES_EMAIL_IDENTITY_SECRET_ARN': email_identity_secret_ses.arn,
+                'SES_DOMAIN_SECRET_ARN': domain_secret_ses.arn,
+            }
+
+            if gcs_pipeline:
+                lambda_secret_arns += [gcs_pipeline.service_account_secret.arn,
+                                       gcs_pipeline.bucket_name_secret.arn]
+                lambda_environment_variables.update({
+                    'GCS_BUCKET_SECRET_ARN': gcs_pipeline.bucket_name_secret.arn,
+                    'GCP_SERVICE_ACCOUNT_SECRET_ARN': gcs_pipeline.service_account_secret.arn,
+                })
+
+        # Lambda performance profile
+        lambda_runtime = config.get("lambda_runtime") or 'python3.8'
+        # x86_64 or arm64
+        lambda_architecture = config.get("lambda_architecture") or 'x86_64'
+        lambda_memory_size = config.get_int("lambda_memory_size") or 128
+        # Size of /tmp in MB
+        lambda_ephemeral_storage = config.get_int("lambda_ephemeral_storage") or 512
+        lambda_reserved_concurrency = config.get_int("lambda_reserved_concurrency")
+        # Provisioned concurrency is configured on a published 'live' alias
+        lambda_provisioned_concurrency = config.get_int("lambda_provisioned_concurrency") or 0
+
+        # Optionally cache secrets in the AWS Parameters and Secrets Lambda extension,
+        # so warm invocations read them from localhost instead of Secrets Manager
+        lambda_secrets_extension = config.get_bool("lambda_secrets_extension") or False
+        lambda_layers = []
+        if lambda_secrets_extension:
+            lambda_layers.append(config.get("lambda_secrets_extension_layer_arn") or
+                                 f"arn:aws:lambda:{region.name}:177933569100:layer:AWS-Parameters-and-Secrets-Lambda-Extension"
+                                 f"{'-Arm64' if lambda_architecture == 'arm64' else ''}:11")
+            lambda_environment_variables.update({
+                'PARAMETERS_SECRETS_EXTENSION_CACHE_ENABLED': 'true',
+                'SECRETS_MANAGER_TTL': str(config.get_int("lambda_secrets_cache_ttl") or 300),
+            })
+
+        # Create an SNS topic
+        sns_topic = aws.sns.Topic('assignmentSubmissionTopic',
+                                  display_name='Assignment Submission Notifications',
+                                  opts=self.child_opts())
+
+        # Email tracking table settings: capacity mode (PAY_PER_REQUEST or PROVISIONED),
+        # TTL attribute, secondary indexes and point-in-time recovery
+        email_tracking_capacity_mode = config.get("email_tracking_capacity_mode") or "PAY_PER_REQUEST"
+        email_tracking_ttl_attribute = config.get("email_tracking_ttl_attribute")
+        email_tracking_indexes = config.get_object("email_tracking_indexes") or []
+        email_tracking_pitr = config.get_bool("email_tracking_point_in_time_recovery") or False
+        if email_tracking_capacity_mode not in ("PAY_PER_REQUEST", "PROVISIONED"):
+            raise ValueError("email_tracking_capacity_mode must be 'PAY_PER_REQUEST' or 'PROVISIONED', "
+                             f"got '{email_tracking_capacity_mode}'")
+        unknown_indexes = set(email_tracking_indexes) - set(EMAIL_TRACKING_INDEXES)
+        if unknown_indexes:
+            raise ValueError(f"Unknown email_tracking_indexes {sorted(unknown_indexes)}, "
+                             f"expected some of {sorted(EMAIL_TRACKING_INDEXES)}")
+        email_tracking_provisioned = email_tracking_capacity_mode == "PROVISIONED"
+        # Provisioned capacity is autoscaled unless email_tracking_autoscaling is false.
+        # Autoscaled capacity is left out of diffs, so the starting capacity is only
+        # sent on create: switching an existing table to PROVISIONED needs one update
+        # with autoscaling off, which sets email_tracking_min_capacity, before enabling it
+        email_tracking_autoscaled = email_tracking_provisioned and config.get_bool("email_tracking_autoscaling") is not False
+        # Starting (or fixed) capacity and autoscaling range in provisioned mode
+        email_tracking_min_capacity = config.get_int("email_tracking_min_capacity") or 5
+        email_tracking_max_capacity = config.get_int("email_tracking_max_capacity") or 100
+
+        email_tracking_attribute_names = ['RequestId']
+        for index_name in email_tracking_indexes:
+            for key in EMAIL_TRACKING_INDEXES[index_name]:
+                if key not in email_tracking_attribute_names:
+                    email_tracking_attribute_names.append(key)
+
+        # DynamoDB Table for Email Tracking
+        email_tracking_table = aws.dynamodb.Table('EmailTrackingTable',
+                                                  attributes=[
+                                                      aws.dynamodb.TableAttributeArgs(
+                                                          # RequestId is the unique identifier for the request,
+                                                          # the rest are index keys; all are strings
+                                                          name=attribute_name,
+                                                          type='S',
+                                                      )
+                                                      for attribute_name in email_tracking_attribute_names
+                                                  ],
+                                                  billing_mode=email_tracking_capacity_mode,
+                                                  read_capacity=email_tracking_min_capacity if email_tracking_provisioned else None,
+                                                  write_capacity=email_tracking_min_capacity if email_tracking_provisioned else None,
+                                                  hash_key='RequestId',
+                                                  name="EmailTrackingTable",
+                                                  global_secondary_indexes=[
+                                                      aws.dynamodb.TableGlobalSecondaryIndexArgs(
+                                                          name=index_name,
+                                                          hash_key=EMAIL_TRACKING_INDEXES[index_name][0],
+                                                          range_key=EMAIL_TRACKING_INDEXES[index_name][1],
+                                                          projection_type='ALL',
+                                                          read_capacity=email_tracking_min_capacity if email_tracking_provisioned else None,
+                                                          write_capacity=email_tracking_min_capacity if email_tracking_provisioned else None,
+                                                      )
+                                                      for index_name in email_tracking_indexes
+                                                  ] or None,
+                                                  ttl=aws.dynamodb.TableTtlArgs(
+                                                      attribute_name=email_tracking_ttl_attribute,
+                                                      enabled=True
+                                                  ) if email_tracking_ttl_attribute else None,
+                                                  point_in_time_recovery=aws.dynamodb.TablePointInTimeRecoveryArgs(
+                                                      enabled=email_tracking_pitr
+                                                  ),
+                                                  tags={
+                                                      'Name': 'EmailTracking',
+                                                      **common_tag,},
+                                                  # Autoscaling owns the table's and the indexes' capacity
+                                                  opts=self.child_opts(ignore_changes=["readCapacity", "writeCapacity",
+                                                                                       "globalSecondaryIndexes[*].readCapacity",
+                                                                                       "globalSecondaryIndexes[*].writeCapacity"]
+                                                                       if email_tracking_autoscaled else None))
+
+        if email_tracking_autoscaled:
+            # Target tracking autoscaling for the table and each index
+            email_tracking_scaled_resources = [("table", pulumi.Output.concat("table/", email_tracking_table.name), "EmailTrackingTable")]
+            email_tracking_scaled_resources += [("index", pulumi.Output.concat("table/", email_tracking_table.name, "/index/", index_name),
+                                                 f"EmailTrackingTable-{index_name}")
+                                                for index_name in email_tracking_indexes]
+
+            for kind, resource_id, scaling_name in email_tracking_scaled_resources:
+                for capacity, metric in (("Read", "DynamoDBReadCapacityUtilization"), ("Write", "DynamoDBWriteCapacityUtilization")):
+                    scaling_target = aws.appautoscaling.Target(f"{scaling_name}-{capacity.lower()}-target",
+                                                               service_namespace="dynamodb",
+                                                               resource_id=resource_id,
+                                                               scalable_dimension=f"dynamodb:{kind}:{capacity}CapacityUnits",
+                                                               min_capacity=email_tracking_min_capacity,
+                                                               max_capacity=email_tracking_max_capacity,
+                                                               opts=self.child_opts())
+
+                    aws.appautoscaling.Policy(f"{scaling_name}-{capacity.lower()}-policy",
+                                              policy_type="TargetTrackingScaling",
+                                              service_namespace=scaling_target.service_namespace,
+                                              resource_id=scaling_target.resource_id,
+                                              scalable_dimension=scaling_target.scalable_dimension,
+                                              target_tracking_scaling_policy_configuration=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationArgs(
+                                                  predefined_metric_specification=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationPredefinedMetricSpecificationArgs(
+                                                      predefined_metric_type=metric
+                                                  ),
+                                                  target_value=config.get_float("email_tracking_target_utilization") or 70
+                                              ),
+                                              opts=self.child_opts())
+
+        # IAM Role for Lambda Function
+        role_lambda = iam.Role('lambdaRole',
+                               assume_role_policy=json.dumps({
+                                   "Version": "2012-10-17",
+                                   "Statement": [{
+                                       "Action": "sts:AssumeRole",
+                                       "Effect": "Allow",
+                                       "Principal": {
+                                           "Service": "lambda.amazonaws.com"
+                                       }
+                                   }]
+                               }),
+                               opts=self.child_opts())
+
+        # Define the policy with the necessary permissions for managing AMIs, Launch Templates, and AutoScaling Groups
+        ami_launch_policy_json = json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "ec2:DescribeImages",
+                        "ec2:DescribeLaunchTemplates",
+                        "ec2:CreateLaunchTemplate",
+                        "ec2:CreateLaunchTemplateVersion",
+                        "autoscaling:CreateAutoScalingGroup",
+                        "autoscaling:UpdateAutoScalingGroup",
+                        "autoscaling:DescribeAutoScalingGroups"
+                    ],
+                    "Resource": "*"
+                }
+            ]
+        })
+
+        # Create the IAM policy resource
+        ami_launch_policy = aws.iam.Policy("amiLaunchPolicy",
+                                           description="Policy for AMI and Launch Template management",
+                                           policy=ami_launch_policy_json,
+                                           opts=self.child_opts())
+
+        # Attach the policy to the IAM Role
+        ami_launch_policy_attachment = aws.iam.RolePolicyAttachment("amiLaunchPolicyAttachment",
+                                                                    role=role_lambda.name,
+                                                                    policy_arn=ami_launch_policy.arn,
+                                                                    opts=self.child_opts())
+
+        # Define the AWSLambdaBasicExecutionRole policy
+        lambda_execution_policy = iam.Policy("lambdaExecutionPolicy",
+                                             description="AWS Lambda Basic Execution Role",
+                                             policy=json.dumps({
+                                                 "Version": "2012-10-17",
+                                                 "Statement": [{
+                                                    "Effect": "Allow",
+                                                    "Action": [
+                                                         "logs:CreateLogGroup",
+                                                         "logs:CreateLogStream",
+                                                         "logs:PutLogEvents"
+                                                    ],
+                                                     "Resource": "arn:aws:logs:::*"
+                                                 },
+                                                 {
+                                                    "Effect": "Allow",
+                                                    "Action": "logs:CreateLogGroup",
+                                                    "Resource": "arn:aws:logs:us-east-1:949500228056:*"
+                                                 },
+                                                 {
+                                                    "Effect": "Allow",
+                                                    "Action": [
+                                                        "logs:CreateLogStream",
+                                                        "logs:PutLogEvents"
+                                                    ],
+                                                    "Resource": [
+                                                        "arn:aws:logs:us-east-1:949500228056:log-group:/aws/lambda/AssignmentSubmissionHandler:*"
+                                                    ]
+                                                }
+                                                 ]
+                                             }),
+                                             opts=self.child_opts())
+
+        # Attach the custom policy to the lambdaRole
+        lambda_execution_policy_attachment = iam.RolePolicyAttachment("lambdaExecutionPolicyAttachment",
+                                                                      role=role_lambda.name,
+                                                                      policy_arn=lambda_execution_policy.arn,
+                                                                      opts=self.child_opts())
+
+        resource_string = f"arn:aws:logs:{region.name}:{account_id}:*"
+
+        policy_document_json = pulumi.Output.all(
+                                                region=region.name,
+                                                account_id=account_id,
+                                                sns_topic_arn=sns_topic.arn,
+                                                email_tracking_table_arn=email_tracking_table.arn,
+                                                secret_arns=pulumi.Output.all(*lambda_secret_arns),
+                                                ).apply(lambda args: json.dumps({
+                                                    "Version": "2012-10-17",
+                                                    "Statement": [
+                                                        {
+                                                            "Effect": "Allow",
+                                                            "Action": ["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"],
+                                                            "Resource": resource_string  
+                                                        },
+                                                        {
+                                                            "Effect": "Allow",
+                                                            "Action": "sns:Publish",
+                                                            "Resource": args['sns_topic_arn']
+                                                        },
+                                                        {
+                                                            "Effect": "Allow",
+                                                            "Action": [
+                                                                "dynamodb:GetItem",
+                                                                "dynamodb:PutItem",
+                                                                "dynamodb:UpdateItem",
+                                                                "dynamodb:DeleteItem",
+                                                                "dynamodb:Scan",
+                                                                "dynamodb:Query",
+                                                                "dynamodb:BatchWriteItem"
+                                                            ],
+                                                            # The table and its secondary indexes
+                                                            "Resource": [
+                                                                args['email_tracking_table_arn'],
+                                                                f"{args['email_tracking_table_arn']}/index/*"
+                                                            ]
+                                                        },
+                                                        {
+                                                            "Effect": "Allow",
+                                                            "Action": [
+                                                                "ses:SendEmail",
+                                                                "ses:SendRawEmail"
+                                                            ],
+                                                            "Resource": "*"
+                                                        },
+                                                        {
+                                                            "Effect": "Allow",
+                                                            "Action": "secretsmanager:GetSecretValue",
+                                                            "Resource": args['secret_arns']
+                                                        }
+                                                    ]}, indent=4))
+
+        # Use the policy document to create the IAM policy resource
+        iam_policy_lambda = aws.iam.Policy("LambdaIAMPolicy",
+                                           description="IAM Policy for Lambda to interact with other services",
+                                           policy=policy_document_json,
+                                           opts=self.child_opts(delete_before_replace=True))
+
+        # Attach the IAM policy to the Lambda execution role
+        iam_policy_attachment_lambda = aws.iam.RolePolicyAttachment("LambdaIAMPolicyAttachment",
+                                                                    role=role_lambda.name,
+                                                                    policy_arn=iam_policy_lambda.arn,
+                                                                    opts=self.child_opts(delete_before_replace=True))
+
+        # Lambda code: built from lambda_source_dir (handler package plus a layer with
+        # the dependencies from its requirements.txt), or a prebuilt lambda_package zip.
+        # Both paths are relative to the project directory unless absolute
+        lambda_source_dir = config.get("lambda_source_dir")
+        lambda_source_code_hash = None
+        if lambda_source_dir:
+            lambda_source_dir = os.path.join(PROJECT_DIR, lambda_source_dir)
+            function_zip = lambda_build.build_function_package(lambda_source_dir)
+            lambda_source_code_hash = lambda_build.source_code_hash(function_zip)
+            code = pulumi.FileArchive(function_zip)
+
+            dependency_layer_zip = lambda_build.build_dependency_layer(
+                os.path.join(lambda_source_dir, "requirements.txt"), lambda_runtime, lambda_architecture)
+            if dependency_layer_zip:
+                dependency_layer = lambda_.LayerVersion("submissionLambdaDependencies",
+                                                        layer_name="submission-lambda-dependencies",
+                                                        code=pulumi.FileArchive(dependency_layer_zip),
+                                                        source_code_hash=lambda_build.source_code_hash(dependency_layer_zip),
+                                                        compatible_runtimes=[lambda_runtime],
+                                                        compatible_architectures=[lambda_architecture],
+                                                        opts=self.child_opts())
+                lambda_layers.append(dependency_layer.arn)
+        else:
+            absolute_path_to_zip = os.path.join(PROJECT_DIR, config.require("lambda_package"))
+
+            code = pulumi.AssetArchive({
+                '.': pulumi.FileArchive(absolute_path_to_zip)
+            })
+
+        # Seconds the function may run; the submission queue's visibility timeout follows it
+        lambda_timeout = 60
+
+        # Lambda Function
+        lambda_function = lambda_.Function('submissionLambda',
+                                           role=role_lambda.arn,
+                                           runtime=lambda_runtime,
+                                           handler='serverless.handler_lambda',
+                                           code=code,
+                                           source_code_hash=lambda_source_code_hash,
+                                           environment={
+                                               'variables': lambda_environment_variables
+                                           },
+                                           layers=lambda_layers or None,
+                                           architectures=[lambda_architecture],
+                                           memory_size=lambda_memory_size,
+                                           ephemeral_storage=lambda_.FunctionEphemeralStorageArgs(
+                                               size=lambda_ephemeral_storage
+                                           ),
+                                           reserved_concurrent_executions=lambda_reserved_concurrency,
+                                           publish=bool(lambda_provisioned_concurrency),
+                                           timeout=lambda_timeout,
+                                           opts=self.child_opts(depends_on=[iam_policy_attachment_lambda]))
+
+        # Function or alias the SNS topic invokes
+        lambda_invoke_target_arn = lambda_function.arn
+        lambda_invoke_qualifier = None
+        if lambda_provisioned_concurrency:
+            # Alias pointing at the latest published version
+            lambda_alias = lambda_.Alias("submissionLambdaLive",
+                                         name="live",
+                                         function_name=lambda_function.name,
+                                         function_version=lambda_function.version,
+                                         opts=self.child_opts())
+
+            provisioned_concurrency_lambda = lambda_.ProvisionedConcurrencyConfig("submissionLambdaProvisionedConcurrency",
+                                                                                  function_name=lambda_function.name,
+                                                                                  qualifier=lambda_alias.name,
+                                                                                  provisioned_concurrent_executions=lambda_provisioned_concurrency,
+                                                                                  opts=self.child_opts())
+
+            lambda_invoke_target_arn = lambda_alias.arn
+            lambda_invoke_qualifier = lambda_alias.name
+
+        invoke_policy_lambda = iam.Policy("lambdaInvokePolicy",
+                                          policy=pulumi.Output.all(sns_topic.arn).apply(lambda arn: json.dumps({
+                                              "Version": "2012-10-17",
+                                              "Statement": [{
+                                                  "Effect": "Allow",
+                                                  "Action": "lambda:InvokeFunction",
+                                                  "Resource": "*",
+                                                  "Condition": {
+                                                      "ArnLike": {
+                                                          "AWS:SourceArn": arn
+                                                      }
+                                                  }
+                                              }]
+                                          })),
+                                          opts=self.child_opts())
+
+        invoke_policy_attachment_lambda = iam.RolePolicyAttachment("lambdaInvokePolicyAttachment",
+                                                                   role=role_lambda.name,
+                                                                   policy_arn=invoke_policy_lambda.arn,
+                                                                   opts=self.child_opts())
+
+        # Optionally buffer submissions in an SQS queue the Lambda consumes in batches,
+        # instead of SNS invoking the Lambda once per message
+        submission_queue_enabled = config.get_bool("submission_queue") or False
+
+        if submission_queue_enabled:
+            # Dead-letter queue for submissions that keep failing
+            submission_dead_letter_queue = aws.sqs.Queue("submissionDeadLetterQueue",
+                                                         message_retention_seconds=1209600,
+                                                         tags={**common_tag, "Type": "submissionDeadLetterQueue"},
+                                                         opts=self.child_opts())
+
+            submission_queue = aws.sqs.Queue("submissionQueue",
+                                             # Lambda recommends at least six times the function timeout
+                                             visibility_timeout_seconds=6 * lambda_timeout,
+                                             redrive_policy=submission_dead_letter_queue.arn.apply(lambda arn: json.dumps({
+                                                 "deadLetterTargetArn": arn,
+                                                 "maxReceiveCount": config.get_int("submission_queue_max_receive_count") or 5
+                                             })),
+                                             tags={**common_tag, "Type": "submissionQueue"},
+                                             opts=self.child_opts())
+
+            # Allow the SNS topic to deliver to the queue
+            submission_queue_policy = aws.sqs.QueuePolicy("submissionQueuePolicy",
+                                                          queue_url=submission_queue.url,
+                                                          policy=pulumi.Output.all(submission_queue.arn, sns_topic.arn).apply(lambda args: json.dumps({
+                                                              "Version": "2012-10-17",
+                                                              "Statement": [{
+                                                                  "Effect": "Allow",
+                                                                  "Principal": {"Service": "sns.amazonaws.com"},
+                                                                  "Action": "sqs:SendMessage",
+                                                                  "Resource": args[0],
+                                                                  "Condition": {
+                                                                      "ArnEquals": {
+                                                                          "aws:SourceArn": args[1]
+                                                                      }
+                                                                  }
+                                                              }]
+                                                          })),
+                                                          opts=self.child_opts())
+
+            # SNS Topic Subscription to the queue
+            topic_subscription_sns = sns.TopicSubscription("snsQueueSubscription",
+                                                           topic=sns_topic.arn,
+                                                           protocol="sqs",
+                                                           endpoint=submission_queue.arn,
+                                                           opts=self.child_opts(depends_on=[submission_queue_policy]))
+
+            # Allow the Lambda to consume the queue
+            queue_policy_lambda = iam.Policy("lambdaQueuePolicy",
+                                             description="Policy for Lambda to consume the submission queue",
+                                             policy=submission_queue.arn.apply(lambda arn: json.dumps({
+                                                 "Version": "2012-10-17",
+                                                 "Statement": [{
+                                                     "Effect": "Allow",
+                                                     "Action": [
+                                                         "sqs:ReceiveMessage",
+                                                         "sqs:DeleteMessage",
+                                                         "sqs:GetQueueAttributes"
+                                                     ],
+                                                     "Resource": arn
+                                                 }]
+                                             })),
+                                             opts=self.child_opts())
+
+            queue_policy_attachment_lambda = iam.RolePolicyAttachment("lambdaQueuePolicyAttachment",
+                                                                      role=role_lambda.name,
+                                                                      policy_arn=queue_policy_lambda.arn,
+                                                                      opts=self.child_opts())
+
+            submission_queue_max_concurrency = config.get_int("submission_queue_max_concurrency")
+            report_batch_item_failures = config.get_bool("submission_queue_report_batch_item_failures")
+
+            # Queue to Lambda event source mapping
+            event_source_mapping_lambda = lambda_.EventSourceMapping("submissionQueueMapping",
+                                                                     event_source_arn=submission_queue.arn,
+                                                                     function_name=lambda_invoke_target_arn,
+                                                                     batch_size=config.get_int("submission_queue_batch_size") or 10,
+                                                                     maximum_batching_window_in_seconds=config.get_int("submission_queue_batching_window") or 5,
+                                                                     scaling_config=lambda_.EventSourceMappingScalingConfigArgs(
+                                                                         maximum_concurrency=submission_queue_max_concurrency
+                                                                     ) if submission_queue_max_concurrency else None,
+                                                                     function_response_types=["ReportBatchItemFailures"] if report_batch_item_failures is not False else None,
+                                                                     opts=self.child_opts(depends_on=[queue_policy_attachment_lambda]))
+        else:
+            # Permission for the SNS Topic to invoke the Lambda function
+            permission_lambda = lambda_.Permission("lambdaPermission",
+                                                   action="lambda:InvokeFunction",
+                                                   function=lambda_function.arn,
+                                                   qualifier=lambda_invoke_qualifier,
+                                                   principal="sns.amazonaws.com",
+                                                   source_arn=sns_topic.arn,
+                                                   opts=self.child_opts(depends_on=[lambda_function]))
+
+            # SNS Topic Subscription to the Lambda function
+            topic_subscription_sns = sns.TopicSubscription("snsTopicSubscription",
+                                                           topic=sns_topic.arn,
+                                                           protocol="lambda",
+                                                           endpoint=lambda_invoke_target_arn,
+                                                           opts=self.child_opts(depends_on=[permission_lambda]))
+
+        self.sns_topic_arn = sns_topic.arn
+        exports = {
+            'lambda_function_arn': lambda_function.arn,
+            'email_tracking_table_name': email_tracking_table.name,
+            'sns_topic_subscription_arn': topic_subscription_sns.id,
+            'lambda_execution_policy.arn': lambda_execution_policy.arn,
+        }
+        if gcs_pipeline:
+            exports['gcs_bucket_name'] = gcs_pipeline.bucket.name
+            exports['gcs_service_account_key'] = gcs_pipeline.service_account_keys.private_key
+        self.finish(**exports)
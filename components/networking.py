@@ -0,0 +1,262 @@
+import pulumi
+from pulumi_aws import ec2
+
+import lookups
+from components import Layer, common_tag
+from subnet_planner import expected_tier_hosts, plan_subnets
+
+config = pulumi.Config()
+
+
+class Networking(Layer):
+    """VPC, subnets and routing, VPC endpoints and the web tier's security groups."""
+
+    OUTPUTS = ("vpc_id", "vpc_cidr", "availability_zones",
+               "public_subnets", "private_subnets", "data_subnets",
+               "web_subnets", "web_subnets_public",
+               "load_balancer_sg_id", "application_sg_id")
+
+    def __init__(self, name, opts=None):
+        super().__init__("Networking", name, opts)
+        region = lookups.get_region()
+
+        # Fetch configurations
+        vpc_name = config.require("my_vpc_name")
+        vpc_cidr = config.require("my_vpc_cidr")
+
+        # Create a VPC
+        vpc = ec2.Vpc(vpc_name, cidr_block=vpc_cidr,
+                      enable_dns_support=True,
+                      enable_dns_hostnames=True,
+                      tags={**common_tag, "Type": "VPC"},
+                      opts=self.child_opts())
+
+        # Create an Internet Gateway
+        ig = ec2.InternetGateway("internetGateway", vpc_id=vpc.id,
+                                 tags={**common_tag, "Type": "Internet Gateway"},
+                                 opts=self.child_opts())
+
+        # Get available AZs
+        azs = lookups.get_availability_zones().names
+        # Use a maximum of az_count AZs (3 by default)
+        num_azs = min(len(azs), config.get_int("az_count") or 3)
+
+        # Subnet tier the web instances run in: "public", or "private" once the
+        # private subnets have a NAT gateway for outbound traffic
+        web_subnet_tier = config.get("web_subnet_tier") or "public"
+        if web_subnet_tier not in ("public", "private"):
+            raise ValueError(f"web_subnet_tier must be 'public' or 'private', got '{web_subnet_tier}'")
+
+        # Optional VPC endpoints so traffic to AWS services stays inside the VPC.
+        # Gateway endpoints (e.g. ["s3", "dynamodb"]) are added to every route table,
+        # interface endpoints (e.g. ["secretsmanager", "sns", "logs"]) to the private subnets.
+        vpc_gateway_endpoints = config.get_object("vpc_gateway_endpoints") or []
+        vpc_interface_endpoints = config.get_object("vpc_interface_endpoints") or []
+
+        # Subnet CIDRs are planned from my_vpc_cidr when subnet_tiers is set, either
+        # as tier name -> expected addresses per AZ or as a list of tier names sized
+        # for the web instances (asg_max_size plus warm_pool_size) and the interface
+        # endpoints. Otherwise the hand-written lists are used
+        subnet_tiers = config.get_object("subnet_tiers")
+        if subnet_tiers:
+            missing_tiers = [tier for tier in ("public", "private") if tier not in subnet_tiers]
+            if missing_tiers:
+                raise ValueError(f"subnet_tiers is missing the required tiers {missing_tiers}")
+            if not isinstance(subnet_tiers, dict):
+                web_instances = (config.get_int("asg_max_size") or 3) + (config.get_int("warm_pool_size") or 0)
+                subnet_tiers = expected_tier_hosts(subnet_tiers, num_azs, web_tier=web_subnet_tier,
+                                                   web_instances=web_instances,
+                                                   interface_endpoints=len(vpc_interface_endpoints))
+            subnet_plan = plan_subnets(vpc_cidr, subnet_tiers, num_azs)
+            public_subnets_cidr = subnet_plan.pop("public")
+            private_subnets_cidr = subnet_plan.pop("private")
+        else:
+            subnet_plan = {}
+            public_subnets_cidr = config.require_object("public_subnets_cidr")
+            private_subnets_cidr = config.require_object("private_subnets_cidr")
+
+        # Create Public Subnets
+        public_subnets = []
+        for i, cidr in enumerate(public_subnets_cidr[:num_azs]):
+            subnet = ec2.Subnet(f"publicSubnet-{i+1}",
+                                vpc_id=vpc.id,
+                                cidr_block=cidr,
+                                availability_zone=azs[i],
+                                map_public_ip_on_launch=True,
+                                tags={**common_tag, "Type": f"publicSubnet-{i+1}"},
+                                opts=self.child_opts())
+            public_subnets.append(subnet)
+
+        # Create Private Subnets
+        private_subnets = []
+        for i, cidr in enumerate(private_subnets_cidr[:num_azs]):
+            subnet = ec2.Subnet(f"privateSubnet-{i+4}",
+                                vpc_id=vpc.id,
+                                cidr_block=cidr,
+                                availability_zone=azs[i],
+                                tags={**common_tag, "Type": f"privateSubnet-{i+4}"},
+                                opts=self.child_opts())
+            private_subnets.append(subnet)
+
+        # Create Public Route Table
+        public_route_table = ec2.RouteTable("publicRouteTable", vpc_id=vpc.id, tags={
+                                            **common_tag, "Type": "publicRouteTable"},
+                                            opts=self.child_opts())
+        ec2.Route("publicRoute", route_table_id=public_route_table.id,
+                  destination_cidr_block="0.0.0.0/0", gateway_id=ig.id,
+                  opts=self.child_opts())
+
+        # Associate Public Subnets to Public Route Table
+        for i, subnet in enumerate(public_subnets):
+            ec2.RouteTableAssociation(
+                f"publicRta-{i}", route_table_id=public_route_table.id, subnet_id=subnet.id,
+                opts=self.child_opts())
+
+        # NAT gateway mode for outbound traffic from the private subnets:
+        # "none" keeps them isolated, "per_az" gives each AZ its own NAT gateway and route table
+        nat_gateway_mode = config.get("nat_gateway_mode") or "none"
+        if nat_gateway_mode not in ("none", "per_az"):
+            raise ValueError(f"nat_gateway_mode must be 'none' or 'per_az', got '{nat_gateway_mode}'")
+
+        if nat_gateway_mode == "none":
+            # Create Private Route Table
+            private_route_table = ec2.RouteTable("privateRouteTable", vpc_id=vpc.id, tags={
+                                                 **common_tag, "Type": "privateRouteTable"},
+                                                 opts=self.child_opts())
+            private_route_tables = [private_route_table]
+        else:
+            private_route_tables = []
+            for i, public_subnet in enumerate(public_subnets[:len(private_subnets)]):
+                nat_eip = ec2.Eip(f"natEip-{i+1}", domain="vpc",
+                                  tags={**common_tag, "Type": f"natEip-{i+1}"},
+                                  opts=self.child_opts())
+                nat_gateway = ec2.NatGateway(f"natGateway-{i+1}",
+                                             allocation_id=nat_eip.id,
+                                             subnet_id=public_subnet.id,
+                                             tags={**common_tag, "Type": f"natGateway-{i+1}"},
+                                             opts=self.child_opts(depends_on=[ig]))
+                nat_route_table = ec2.RouteTable(f"privateRouteTable-{i+1}", vpc_id=vpc.id, tags={
+                                                 **common_tag, "Type": f"privateRouteTable-{i+1}"},
+                                                 opts=self.child_opts())
+                ec2.Route(f"privateNatRoute-{i+1}", route_table_id=nat_route_table.id,
+                          destination_cidr_block="0.0.0.0/0", nat_gateway_id=nat_gateway.id,
+                          opts=self.child_opts())
+                private_route_tables.append(nat_route_table)
+
+        # Associate Private Subnets to Private Route Table
+        for i, subnet in enumerate(private_subnets):
+            ec2.RouteTableAssociation(
+                f"privateRta-{i}", route_table_id=private_route_tables[i % len(private_route_tables)].id, subnet_id=subnet.id,
+                opts=self.child_opts())
+
+        # Create Subnets for the additional planned tiers (e.g. data, endpoints),
+        # routed like the private subnets
+        tier_subnets = {}
+        for tier, cidrs in subnet_plan.items():
+            tier_subnets[tier] = []
+            for i, cidr in enumerate(cidrs):
+                subnet = ec2.Subnet(f"{tier}Subnet-{i+1}",
+                                    vpc_id=vpc.id,
+                                    cidr_block=cidr,
+                                    availability_zone=azs[i],
+                                    tags={**common_tag, "Type": f"{tier}Subnet-{i+1}"},
+                                    opts=self.child_opts())
+                ec2.RouteTableAssociation(
+                    f"{tier}Rta-{i}", route_table_id=private_route_tables[i % len(private_route_tables)].id, subnet_id=subnet.id,
+                    opts=self.child_opts())
+                tier_subnets[tier].append(subnet)
+
+        # Load balancer Security Group
+        load_balancer_sg = ec2.SecurityGroup('loadBalancerSecurityGroup',
+                                             vpc_id=vpc.id,
+                                             description='Security group for load balancer',
+                                             ingress=[
+                                                 ec2.SecurityGroupIngressArgs(
+                                                     protocol='tcp',
+                                                     from_port=443,
+                                                     to_port=443,
+                                                     cidr_blocks=["0.0.0.0/0"]),
+                                             ],
+                                             egress=[
+                                                 ec2.SecurityGroupEgressArgs(
+                                                     protocol="-1", from_port=0, to_port=0, cidr_blocks=["0.0.0.0/0"]),
+                                             ],
+                                             tags={**common_tag,
+                                                   "Type": "loadBalancerSecurityGroup"},
+                                             opts=self.child_opts()
+                                             )
+
+        # Application Security Group
+        application_sg = ec2.SecurityGroup("applicationSecurityGroup",
+                                           vpc_id=vpc.id,
+                                           description="Security group for application server",
+                                           ingress=[
+                                               {
+                                                   "protocol": "tcp",
+                                                   "from_port": 8080,
+                                                   "to_port": 8080,
+                                                   "security_groups": [load_balancer_sg.id]
+                                               }
+                                           ],
+                                           egress=[
+                                                ec2.SecurityGroupEgressArgs(
+                                                    protocol="tcp", from_port=3306, to_port=3306, cidr_blocks=["0.0.0.0/0"]),
+                                                ec2.SecurityGroupEgressArgs(
+                                                    protocol="-1", from_port=0, to_port=0, cidr_blocks=["0.0.0.0/0"]),
+                                                ],
+                                           tags={**common_tag,
+                                                 "Type": "applicationSecurityGroup"},
+                                           opts=self.child_opts()
+                                           )
+
+        for service in vpc_gateway_endpoints:
+            ec2.VpcEndpoint(f"{service}GatewayEndpoint",
+                            vpc_id=vpc.id,
+                            service_name=f"com.amazonaws.{region.name}.{service}",
+                            vpc_endpoint_type="Gateway",
+                            route_table_ids=[route_table.id for route_table in private_route_tables + [public_route_table]],
+                            tags={**common_tag, "Type": f"{service}GatewayEndpoint"},
+                            opts=self.child_opts())
+
+        if vpc_interface_endpoints:
+            # Endpoint Security Group
+            endpoint_sg = ec2.SecurityGroup("endpointSecurityGroup",
+                                            vpc_id=vpc.id,
+                                            description="Security group for VPC interface endpoints",
+                                            ingress=[
+                                                ec2.SecurityGroupIngressArgs(
+                                                    protocol="tcp",
+                                                    from_port=443,
+                                                    to_port=443,
+                                                    security_groups=[application_sg.id]),
+                                            ],
+                                            tags={**common_tag, "Type": "endpointSecurityGroup"},
+                                            opts=self.child_opts())
+
+            for service in vpc_interface_endpoints:
+                ec2.VpcEndpoint(f"{service}InterfaceEndpoint",
+                                vpc_id=vpc.id,
+                                service_name=f"com.amazonaws.{region.name}.{service}",
+                                vpc_endpoint_type="Interface",
+                                private_dns_enabled=True,
+                                subnet_ids=[subnet.id for subnet in tier_subnets.get("endpoints", private_subnets)],
+                                security_group_ids=[endpoint_sg.id],
+                                tags={**common_tag, "Type": f"{service}InterfaceEndpoint"},
+                                opts=self.child_opts())
+
+        if web_subnet_tier == "private" and nat_gateway_mode == "none":
+            raise ValueError("web_subnet_tier 'private' requires nat_gateway_mode 'per_az'")
+        web_subnets = private_subnets if web_subnet_tier == "private" else public_subnets
+
+        self.vpc_id = vpc.id
+        self.vpc_cidr = vpc_cidr
+        self.availability_zones = azs[:num_azs]
+        self.public_subnets = [subnet.id for subnet in public_subnets]
+        self.private_subnets = [subnet.id for subnet in private_subnets]
+        # The database and its proxy use the data tier when one is planned
+        self.data_subnets = [subnet.id for subnet in tier_subnets.get("data", private_subnets)]
+        self.web_subnets = [subnet.id for subnet in web_subnets]
+        self.web_subnets_public = web_subnet_tier == "public"
+        self.load_balancer_sg_id = load_balancer_sg.id
+        self.application_sg_id = application_sg.id
+        self.finish()
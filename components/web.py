@@ -0,0 +1,633 @@
+import base64
+import json
+
+import pulumi
+import pulumi_aws as aws
+from pulumi_aws import ec2, iam, route53
+
+import lookups
+import user_data
+from components import Layer, common_tag
+
+config = pulumi.Config()
+
+# Load balancer performance profiles: "default" keeps the original settings,
+# "performance" routes to the least busy instance, ramps new instances up,
+# detects failed instances in about 20s instead of 150s and drains in 30s.
+# Individual settings can be overridden with load_balancer_settings.
+LB_PROFILES = {
+    "default": {
+        "algorithm": "round_robin",
+        "slow_start": 0,
+        "deregistration_delay": 300,
+        "health_check_interval": 30,
+        "health_check_timeout": 5,
+        "healthy_threshold": 3,
+        "unhealthy_threshold": 5,
+        "idle_timeout": 60,
+        "http2": True,
+        "ssl_policy": "ELBSecurityPolicy-2016-08",
+        "cross_zone": "use_load_balancer_configuration",
+    },
+    "performance": {
+        "algorithm": "least_outstanding_requests",
+        "slow_start": 60,
+        "deregistration_delay": 30,
+        "health_check_interval": 10,
+        "health_check_timeout": 5,
+        "healthy_threshold": 2,
+        "unhealthy_threshold": 2,
+        "idle_timeout": 60,
+        "http2": True,
+        "ssl_policy": "ELBSecurityPolicy-TLS13-1-2-2021-06",
+        "cross_zone": "true",
+    },
+}
+
+
+class Web(Layer):
+    """The web tier: load balancer, launch template, auto scaling group and its scaling, DNS and the optional CloudFront distribution."""
+
+    def __init__(self, name, network, data, messaging, opts=None):
+        super().__init__("Web", name, opts)
+        region = lookups.get_region()
+        ami_owner = config.require("ami_owner")
+
+        # Fetch the ACM certificate's ARN for your domain
+        certificate_domain = config.require("certificate_domain")
+        selected_certificate = lookups.get_certificate(certificate_domain)
+
+        # Load balancer settings: a profile from LB_PROFILES plus overrides
+        lb_profile = config.get("load_balancer_profile") or "default"
+        if lb_profile not in LB_PROFILES:
+            raise ValueError(f"Unknown load_balancer_profile {lb_profile}, expected one of {sorted(LB_PROFILES)}")
+        lb_settings = {**LB_PROFILES[lb_profile], **(config.get_object("load_balancer_settings") or {})}
+        unknown_lb_settings = set(lb_settings) - set(LB_PROFILES["default"])
+        if unknown_lb_settings:
+            raise ValueError(f"Unknown load_balancer_settings {sorted(unknown_lb_settings)}")
+
+        # Load Balancer (ELB)
+        load_balancer = aws.lb.LoadBalancer("app-load-balancer",
+                                            name="demoLoadBalancer",
+                                            internal=False,
+                                            load_balancer_type="application",
+                                            security_groups=[network.load_balancer_sg_id],
+                                            subnets=network.public_subnets,
+                                            idle_timeout=lb_settings["idle_timeout"],
+                                            enable_http2=lb_settings["http2"],
+                                            tags={'Name': "Load Balancer"},
+                                            opts=self.child_opts()
+                                            )
+
+        # Target Group
+        target_group = aws.lb.TargetGroup("target-group",
+                                          name_prefix="demoTG",
+                                          port=8080,
+                                          protocol="HTTP",
+                                          vpc_id=network.vpc_id,
+                                          # Other configurations like health checks
+                                          target_type="instance",
+                                          load_balancing_algorithm_type=lb_settings["algorithm"],
+                                          load_balancing_cross_zone_enabled=lb_settings["cross_zone"],
+                                          slow_start=lb_settings["slow_start"],
+                                          deregistration_delay=lb_settings["deregistration_delay"],
+                                          health_check=aws.lb.TargetGroupHealthCheckArgs(
+                                              enabled=True,
+                                              path="/healthz",
+                                              port="8080",
+                                              protocol="HTTP",
+                                              healthy_threshold=lb_settings["healthy_threshold"],
+                                              unhealthy_threshold=lb_settings["unhealthy_threshold"],
+                                              timeout=lb_settings["health_check_timeout"],
+                                              interval=lb_settings["health_check_interval"],
+                                              matcher="200"
+                                          ),
+                                          tags={"Name": "target-group"},
+                                          opts=self.child_opts()
+                                          )
+
+        # Listener
+        listener = aws.lb.Listener("listener",
+                                   load_balancer_arn=load_balancer.arn,
+                                   port=443,
+                                   protocol="HTTPS",
+                                   ssl_policy=lb_settings["ssl_policy"],
+                                   certificate_arn=selected_certificate.arn,  # SSL Certificate ARN
+                                   default_actions=[aws.lb.ListenerDefaultActionArgs(
+                                       type="forward",
+                                       target_group_arn=target_group.arn
+                                   )],
+                                   opts=self.child_opts(depends_on=[load_balancer, target_group]
+                                   )
+                                   )
+
+        # Optional warm pool of pre-initialized instances (Stopped, Hibernated or Running).
+        # Instances hold a launch lifecycle hook until their boot script has finished,
+        # so they only enter the pool (or service) fully initialized; a service the
+        # boot script installs completes the hook again when they leave the pool.
+        warm_pool_size = config.get_int("warm_pool_size") or 0
+        warm_pool_state = config.get("warm_pool_state") or "Stopped"
+        if warm_pool_state not in ("Stopped", "Hibernated", "Running"):
+            raise ValueError(f"warm_pool_state must be 'Stopped', 'Hibernated' or 'Running', got '{warm_pool_state}'")
+        warm_pool_max_prepared_capacity = config.get_int("warm_pool_max_prepared_capacity")
+        warm_pool_reuse_on_scale_in = config.get_bool("warm_pool_reuse_on_scale_in") or False
+        launch_lifecycle_hook_name = "webapp-initialized" if warm_pool_size else None
+
+        # Seconds the boot script waits for the database and SNS before starting the webapp anyway
+        boot_readiness_timeout = config.get_int("boot_readiness_timeout") or 300
+
+        database_password = config.require_secret("database_password")
+
+        # Function to generate the user data script
+        def generate_user_data_script(hostname, password, sns_topic_arn, read_hosts="", lifecycle_hook_name=None):
+            # Environment for the webapp service
+            env = {
+                "DB_HOST": hostname,
+                "DB_READ_HOSTS": read_hosts or hostname,
+                "DB_USERNAME": "csye6225",
+                "DB_PASSWORD": password,
+                "DB_NAME": "csye6225",
+                "SNS_TOPIC_ARN": sns_topic_arn,
+            }
+
+            # Start the webapp as soon as its dependencies answer instead of after a fixed delay
+            readiness_checks = [
+                ("database", user_data.tcp_check(hostname, 3306)),
+                ("sns", f"aws sns get-topic-attributes --region {region.name} --topic-arn {sns_topic_arn}"),
+            ]
+
+            extra_phases = []
+            if lifecycle_hook_name:
+                extra_phases.append(user_data.lifecycle_hook_phase(region.name, "auto-scaling-group", lifecycle_hook_name))
+
+            return user_data.render_boot_script(env,
+                                                region=region.name,
+                                                readiness_checks=readiness_checks,
+                                                log_keys=["DB_HOST", "DB_READ_HOSTS", "DB_USERNAME", "DB_NAME", "SNS_TOPIC_ARN"],
+                                                readiness_timeout=boot_readiness_timeout,
+                                                extra_phases=extra_phases)
+
+        # Use the apply method to generate the user data script with the RDS endpoint and password
+        user_data_script = pulumi.Output.all(data.db_host, database_password, messaging.sns_topic_arn, data.db_read_hosts).apply(
+            lambda args: generate_user_data_script(*args, lifecycle_hook_name=launch_lifecycle_hook_name))
+
+        # Encode user data for use in launch configuration
+        encoded_user_data_script = user_data_script.apply(
+            lambda uds: base64.b64encode(uds.encode('utf-8')).decode('utf-8'))
+
+        #For EC2 : IAM Role
+        role_iam = iam.Role("ec2Role",
+                        assume_role_policy=json.dumps({
+                            "Version": "2012-10-17",
+                            "Statement": [{
+                                "Action": "sts:AssumeRole",
+                                "Effect": "Allow",
+                                "Principal": {
+                                    "Service": "ec2.amazonaws.com"
+                                }
+                            }]
+                        }),
+                            opts=self.child_opts())
+
+        policy_ses = iam.Policy("sesPolicy",
+                                description="Policy to allow EC2 to send emails through SES",
+                                policy=json.dumps({
+                                    "Version": "2012-10-17",
+                                    "Statement": [{
+                                        "Effect": "Allow",
+                                        "Action": [
+                                            "ses:SendEmail",
+                                            "ses:SendRawEmail",
+                                            "ses:SendTemplatedEmail"
+                                        ],
+                                        "Resource": "*"
+                                    }]
+                                }),
+                                opts=self.child_opts())
+
+        # Attach custom SES policy with the role
+        policy_ses_attachment = iam.RolePolicyAttachment("sesPolicyAttachment",
+                                                         role=role_iam.name,
+                                                         policy_arn=policy_ses.arn,
+                                                         opts=self.child_opts())
+
+        # Allow the boot script to check that the SNS topic is reachable
+        policy_boot_readiness = iam.Policy("bootReadinessPolicy",
+                                           description="Policy to allow EC2 boot readiness checks",
+                                           policy=pulumi.Output.from_input(messaging.sns_topic_arn).apply(lambda arn: json.dumps({
+                                               "Version": "2012-10-17",
+                                               "Statement": [{
+                                                   "Effect": "Allow",
+                                                   "Action": "sns:GetTopicAttributes",
+                                                   "Resource": arn
+                                               }]
+                                           })),
+                                           opts=self.child_opts())
+
+        policy_boot_readiness_attachment = iam.RolePolicyAttachment("bootReadinessPolicyAttachment",
+                                                                    role=role_iam.name,
+                                                                    policy_arn=policy_boot_readiness.arn,
+                                                                    opts=self.child_opts())
+
+
+        # List policy ARNs you want to attach with the role
+        policies = [
+            "arn:aws:iam::aws:policy/AmazonEC2FullAccess",
+            "arn:aws:iam::aws:policy/AmazonRDSFullAccess",
+            "arn:aws:iam::aws:policy/AmazonSSMManagedInstanceCore",
+            "arn:aws:iam::aws:policy/AmazonVPCFullAccess",
+            "arn:aws:iam::aws:policy/CloudWatchAgentServerPolicy",
+            "arn:aws:iam::aws:policy/AutoScalingFullAccess",
+            "arn:aws:iam::aws:policy/ElasticLoadBalancingFullAccess",
+            "arn:aws:iam::aws:policy/IAMUserChangePassword"
+        ]
+
+        # Attach policies with the role
+        for policy_arn in policies:
+            attachment = aws.iam.RolePolicyAttachment(f'attach-{policy_arn.split(":")[-1]}',
+                                                      policy_arn=policy_arn,
+                                                      role=role_iam.name,
+                                                      opts=self.child_opts())
+    
+
+        # Create EC2 Instance Profile
+        profile_instance = iam.InstanceProfile("instanceProfile", role=role_iam.name,
+                                               opts=self.child_opts())
+
+        # EC2 Instance
+        # ami_id = config.require("ami_id")  
+
+        latest_ami = lookups.get_ami(owners=[ami_owner], name_pattern="my-custom-ami-*")
+
+        # Use the latest AMI ID
+        ami_id = latest_ami.id
+
+        # ami = ec2.get_ami(most_recent=True,
+        #                   owners=["amazon"],
+        #                   filters=[{"name":"name","values":["amzn2-ami-hvm-*-x86_64-gp2"]}])
+
+        ec2_launch_template = ec2.LaunchTemplate('launchTemplate',
+                                                name='web-app-launch-template',
+                                                image_id=ami_id,
+                                                instance_type="t2.micro",
+                                                key_name="keypair_webapp",
+                                                network_interfaces=[{
+                                                    'associate_public_ip_address': network.web_subnets_public,
+                                                    'security_groups': [network.application_sg_id]
+                                                }],
+                                                block_device_mappings=[{
+                                                    'device_name': latest_ami.root_device_name,
+                                                    'ebs': {
+                                                        'volume_size': 25,
+                                                        'volume_type': "gp2",
+                                                        # Hibernation stores RAM on the root volume, which must be encrypted
+                                                        'encrypted': True if warm_pool_size and warm_pool_state == "Hibernated" else None,
+                                                        'delete_on_termination': True
+                                                    }
+                                                }],
+                                                user_data=encoded_user_data_script,
+                                                iam_instance_profile=aws.ec2.LaunchTemplateIamInstanceProfileArgs(
+                                                    arn=profile_instance.arn
+                                                ),
+                                                hibernation_options=aws.ec2.LaunchTemplateHibernationOptionsArgs(
+                                                    configured=True
+                                                ) if warm_pool_size and warm_pool_state == "Hibernated" else None,
+                                                disable_api_termination=False,
+                                                tag_specifications=[
+                                                    aws.ec2.LaunchTemplateTagSpecificationArgs(
+                                                        resource_type='instance',
+                                                        tags={**common_tag,
+                                                            "Type": "webInstance"}
+                                                    )
+                                                ],
+                                                opts=self.child_opts(depends_on=[
+                                                    profile_instance
+                                                ]))
+
+        # Auto Scaling Group size
+        asg_min_size = config.get_int("asg_min_size") or 1
+        asg_max_size = config.get_int("asg_max_size") or 3
+        asg_desired_capacity = config.get_int("asg_desired_capacity") or asg_min_size
+
+        # Rolling instance refresh whenever the launch template (e.g. its AMI) changes.
+        # The group then tracks the template's latest version number instead of
+        # '$Latest', so a new template version shows up as a change to the group.
+        instance_refresh_enabled = config.get_bool("instance_refresh") or False
+        instance_refresh_checkpoints = config.get_object("instance_refresh_checkpoint_percentages")
+        instance_refresh = aws.autoscaling.GroupInstanceRefreshArgs(
+            strategy="Rolling",
+            preferences=aws.autoscaling.GroupInstanceRefreshPreferencesArgs(
+                # Launch replacements before terminating, so capacity never drops
+                min_healthy_percentage=config.get_int("instance_refresh_min_healthy_percentage") or 100,
+                max_healthy_percentage=config.get_int("instance_refresh_max_healthy_percentage") or 200,
+                instance_warmup=str(config.get_int("instance_refresh_warmup") or 60),
+                checkpoint_percentages=instance_refresh_checkpoints,
+                checkpoint_delay=str(config.get_int("instance_refresh_checkpoint_delay") or 300) if instance_refresh_checkpoints else None,
+                skip_matching=True
+            )
+        ) if instance_refresh_enabled else None
+
+        # Auto Scaling Group
+        auto_scaling_group = aws.autoscaling.Group('autoScalingGroup',
+                                                   name='auto-scaling-group',
+                                                   launch_template=aws.autoscaling.GroupLaunchTemplateArgs(
+                                                       id=ec2_launch_template.id,
+                                                       version=ec2_launch_template.latest_version.apply(str) if instance_refresh_enabled else '$Latest'
+                                                   ),
+                                                   instance_refresh=instance_refresh,
+                                                   # List of subnet IDs
+                                                   vpc_zone_identifiers=network.web_subnets,
+                                                   min_size=asg_min_size,
+                                                   max_size=asg_max_size,
+                                                   desired_capacity=asg_desired_capacity,
+                                                   target_group_arns=[
+                                                       target_group.arn],
+                                                   health_check_type='ELB',
+                                                   health_check_grace_period=60,
+                                                   force_delete=True,
+                                                   warm_pool=aws.autoscaling.GroupWarmPoolArgs(
+                                                       pool_state=warm_pool_state,
+                                                       min_size=warm_pool_size,
+                                                       max_group_prepared_capacity=warm_pool_max_prepared_capacity,
+                                                       instance_reuse_policy=aws.autoscaling.GroupWarmPoolInstanceReusePolicyArgs(
+                                                           reuse_on_scale_in=warm_pool_reuse_on_scale_in
+                                                       )
+                                                   ) if warm_pool_size else None,
+                                                   tags=[{
+                                                       'key': 'Name',
+                                                       'value': 'AutoScaleGroup',
+                                                       'propagate_at_launch': True,
+                                                   }],
+                                                   opts=self.child_opts(depends_on=[
+                                                       ec2_launch_template, target_group])
+                                                   )
+
+        # Launch lifecycle hook held until the boot script completes it. A separate
+        # resource rather than initial_lifecycle_hooks, which only applies when the
+        # group is created, so enabling a warm pool on an existing group adds it too
+        if launch_lifecycle_hook_name:
+            aws.autoscaling.LifecycleHook("launchLifecycleHook",
+                                          name=launch_lifecycle_hook_name,
+                                          autoscaling_group_name=auto_scaling_group.name,
+                                          lifecycle_transition="autoscaling:EC2_INSTANCE_LAUNCHING",
+                                          default_result="ABANDON",
+                                          heartbeat_timeout=config.get_int("warm_pool_init_timeout") or 600,
+                                          opts=self.child_opts())
+
+        # Scaling: target tracking on ALB requests per target and/or CPU, plus
+        # optional step scaling for bursts. Without a target tracking policy the group
+        # falls back to the simple CPU alarm policies, which also give burst step
+        # scaling a way to scale back in.
+        scaling_request_count_target = config.get_int("scaling_request_count_target")
+        scaling_cpu_target = config.get_float("scaling_cpu_target")
+        scaling_instance_warmup = config.get_int("scaling_instance_warmup") or 120
+        # Requests per target per minute above which the burst steps kick in, and
+        # the steps as {"lower": ..., "upper": ..., "adjustment": ...} relative to it
+        scaling_burst_threshold = config.get_int("scaling_burst_threshold")
+        scaling_burst_steps = config.get_object("scaling_burst_steps") or [
+            {"lower": 0, "upper": 500, "adjustment": 1},
+            {"lower": 500, "upper": 1500, "adjustment": 2},
+            {"lower": 1500, "adjustment": 3},
+        ]
+
+        # ALB/target group pair the request count metric is reported for
+        request_count_resource_label = pulumi.Output.concat(load_balancer.arn_suffix, "/", target_group.arn_suffix)
+
+        scaling_policies = {}
+
+        if scaling_request_count_target:
+            scaling_policies["request_count"] = aws.autoscaling.Policy("requestCountTrackingPolicy",
+                                                                       autoscaling_group_name=auto_scaling_group.name,
+                                                                       policy_type="TargetTrackingScaling",
+                                                                       estimated_instance_warmup=scaling_instance_warmup,
+                                                                       target_tracking_configuration=aws.autoscaling.PolicyTargetTrackingConfigurationArgs(
+                                                                           predefined_metric_specification=aws.autoscaling.PolicyTargetTrackingConfigurationPredefinedMetricSpecificationArgs(
+                                                                               predefined_metric_type="ALBRequestCountPerTarget",
+                                                                               resource_label=request_count_resource_label
+                                                                           ),
+                                                                           target_value=scaling_request_count_target
+                                                                       ),
+                                                                       opts=self.child_opts())
+
+        if scaling_cpu_target:
+            scaling_policies["cpu"] = aws.autoscaling.Policy("cpuTrackingPolicy",
+                                                             autoscaling_group_name=auto_scaling_group.name,
+                                                             policy_type="TargetTrackingScaling",
+                                                             estimated_instance_warmup=scaling_instance_warmup,
+                                                             target_tracking_configuration=aws.autoscaling.PolicyTargetTrackingConfigurationArgs(
+                                                                 predefined_metric_specification=aws.autoscaling.PolicyTargetTrackingConfigurationPredefinedMetricSpecificationArgs(
+                                                                     predefined_metric_type="ASGAverageCPUUtilization"
+                                                                 ),
+                                                                 target_value=scaling_cpu_target
+                                                             ),
+                                                             opts=self.child_opts())
+
+        if scaling_burst_threshold:
+            scaling_policies["burst"] = aws.autoscaling.Policy("burstStepScalingPolicy",
+                                                               autoscaling_group_name=auto_scaling_group.name,
+                                                               policy_type="StepScaling",
+                                                               adjustment_type="ChangeInCapacity",
+                                                               metric_aggregation_type="Average",
+                                                               estimated_instance_warmup=scaling_instance_warmup,
+                                                               step_adjustments=[
+                                                                   aws.autoscaling.PolicyStepAdjustmentArgs(
+                                                                       metric_interval_lower_bound=str(step["lower"]),
+                                                                       metric_interval_upper_bound=str(step["upper"]) if step.get("upper") is not None else None,
+                                                                       scaling_adjustment=step["adjustment"])
+                                                                   for step in scaling_burst_steps
+                                                               ],
+                                                               opts=self.child_opts())
+
+            # Burst CloudWatch alarm on requests per target
+            burst_alarm = aws.cloudwatch.MetricAlarm("burstAlarm",
+                                                     comparison_operator="GreaterThanOrEqualToThreshold",
+                                                     evaluation_periods=1,
+                                                     metric_name="RequestCountPerTarget",
+                                                     namespace="AWS/ApplicationELB",
+                                                     period=60,
+                                                     statistic="Sum",
+                                                     threshold=scaling_burst_threshold,
+                                                     alarm_actions=[
+                                                         scaling_policies["burst"].arn],
+                                                     dimensions={
+                                                         "TargetGroup": target_group.arn_suffix,
+                                                         "LoadBalancer": load_balancer.arn_suffix},
+                                                     opts=self.child_opts()
+                                                     )
+
+        if not (scaling_request_count_target or scaling_cpu_target):
+            # Scale-Up Policy
+            scale_up_policy = aws.autoscaling.Policy("scaleUpPolicy",
+                                                     autoscaling_group_name=auto_scaling_group.name,
+                                                     adjustment_type="ChangeInCapacity",
+                                                     scaling_adjustment=1,
+                                                     cooldown=60,
+                                                     opts=self.child_opts()
+                                                     )
+
+            # Scale-Down Policy
+            scale_down_policy = aws.autoscaling.Policy("scaleDownPolicy",
+                                                       autoscaling_group_name=auto_scaling_group.name,
+                                                       adjustment_type="ChangeInCapacity",
+                                                       scaling_adjustment=-1,
+                                                       cooldown=60,
+                                                       opts=self.child_opts()
+                                                       )
+
+            # Scale-Up Cloud Watch alarm
+            scale_up_alarm = aws.cloudwatch.MetricAlarm("scaleUpAlarm",
+                                                        comparison_operator="GreaterThanThreshold",
+                                                        evaluation_periods=2,
+                                                        metric_name="CPUUtilization",
+                                                        namespace="AWS/EC2",
+                                                        period=120,
+                                                        statistic="Average",
+                                                        threshold=5,
+                                                        alarm_actions=[
+                                                            scale_up_policy.arn],
+                                                        dimensions={
+                                                            "AutoScalingGroupName": auto_scaling_group.name},
+                                                        opts=self.child_opts()
+                                                        )
+
+            # Scale-Down Cloud Watch alarm
+            scale_down_alarm = aws.cloudwatch.MetricAlarm("scaleDownAlarm",
+                                                          comparison_operator="LessThanThreshold",
+                                                          evaluation_periods=2,
+                                                          metric_name="CPUUtilization",
+                                                          namespace="AWS/EC2",
+                                                          period=120,
+                                                          statistic="Average",
+                                                          threshold=3,
+                                                          alarm_actions=[
+                                                              scale_down_policy.arn],
+                                                          dimensions={
+                                                              "AutoScalingGroupName": auto_scaling_group.name},
+                                                          opts=self.child_opts()
+                                                          )
+
+            scaling_policies["scale_up"] = scale_up_policy
+            scaling_policies["scale_down"] = scale_down_policy
+
+        # Access hosted zone ID and domain name from the configuration
+        hosted_zone_id = config.require("hosted_zone_id")
+        domain_name = config.require("domain_name")
+        # public_ip = ec2_instance.public_ip # Get the public IP of the EC2 instance   
+
+        # Optional CloudFront distribution in front of the load balancer. Requests are
+        # passed through uncached by default (the API); cloudfront_cache_paths maps
+        # path patterns to a default TTL in seconds, e.g. {"/static/*": 86400}.
+        cloudfront_enabled = config.get_bool("cloudfront") or False
+        cloudfront_cache_paths = config.get_object("cloudfront_cache_paths") or {}
+
+        # Managed CloudFront policies
+        CACHING_DISABLED_POLICY_ID = "4135ea2d-6df8-44a3-9df3-4b5a84be39ad"
+        ALL_VIEWER_ORIGIN_REQUEST_POLICY_ID = "216adef6-5c7f-47e4-b989-5492eafa07d3"
+
+        alias_target = {
+            "name": load_balancer.dns_name,
+            "zone_id": load_balancer.zone_id,
+            "evaluate_target_health": True,
+        }
+
+        if cloudfront_enabled:
+            # CloudFront only accepts ACM certificates from us-east-1
+            cloudfront_certificate = (selected_certificate if region.name == "us-east-1"
+                                      else lookups.get_certificate(certificate_domain, region="us-east-1"))
+
+            cloudfront_behaviors = []
+            for i, (path_pattern, ttl) in enumerate(cloudfront_cache_paths.items()):
+                # Cache Policy for one cached path
+                cache_policy = aws.cloudfront.CachePolicy(f"webappCachePolicy-{i + 1}",
+                                                          comment=f"Caches {path_pattern} for {ttl}s unless the origin says otherwise",
+                                                          min_ttl=0,
+                                                          default_ttl=ttl,
+                                                          max_ttl=max(ttl, 31536000),
+                                                          parameters_in_cache_key_and_forwarded_to_origin=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginArgs(
+                                                              cookies_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginCookiesConfigArgs(
+                                                                  cookie_behavior="none"),
+                                                              headers_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigArgs(
+                                                                  header_behavior="none"),
+                                                              query_strings_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginQueryStringsConfigArgs(
+                                                                  query_string_behavior="all"),
+                                                              enable_accept_encoding_gzip=True,
+                                                              enable_accept_encoding_brotli=True),
+                                                          opts=self.child_opts())
+
+                cloudfront_behaviors.append(aws.cloudfront.DistributionOrderedCacheBehaviorArgs(
+                    path_pattern=path_pattern,
+                    target_origin_id="webapp-alb",
+                    viewer_protocol_policy="redirect-to-https",
+                    allowed_methods=["GET", "HEAD", "OPTIONS"],
+                    cached_methods=["GET", "HEAD"],
+                    compress=True,
+                    cache_policy_id=cache_policy.id,
+                    origin_request_policy_id=ALL_VIEWER_ORIGIN_REQUEST_POLICY_ID))
+
+            # CloudFront Distribution
+            # The Host header is forwarded, so CloudFront connects to the load balancer
+            # as domain_name and its certificate matches
+            cloudfront_distribution = aws.cloudfront.Distribution("webappDistribution",
+                                                                  enabled=True,
+                                                                  is_ipv6_enabled=True,
+                                                                  http_version="http2and3",
+                                                                  price_class=config.get("cloudfront_price_class") or "PriceClass_100",
+                                                                  aliases=[domain_name],
+                                                                  origins=[aws.cloudfront.DistributionOriginArgs(
+                                                                      origin_id="webapp-alb",
+                                                                      domain_name=load_balancer.dns_name,
+                                                                      custom_origin_config=aws.cloudfront.DistributionOriginCustomOriginConfigArgs(
+                                                                          http_port=80,
+                                                                          https_port=443,
+                                                                          origin_protocol_policy="https-only",
+                                                                          origin_ssl_protocols=["TLSv1.2"],
+                                                                          origin_keepalive_timeout=60))],
+                                                                  default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(
+                                                                      target_origin_id="webapp-alb",
+                                                                      viewer_protocol_policy="redirect-to-https",
+                                                                      allowed_methods=["DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT"],
+                                                                      cached_methods=["GET", "HEAD"],
+                                                                      compress=True,
+                                                                      cache_policy_id=CACHING_DISABLED_POLICY_ID,
+                                                                      origin_request_policy_id=ALL_VIEWER_ORIGIN_REQUEST_POLICY_ID),
+                                                                  ordered_cache_behaviors=cloudfront_behaviors,
+                                                                  restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+                                                                      geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(
+                                                                          restriction_type="none")),
+                                                                  viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(
+                                                                      acm_certificate_arn=cloudfront_certificate.arn,
+                                                                      ssl_support_method="sni-only",
+                                                                      minimum_protocol_version="TLSv1.2_2021"),
+                                                                  tags={**common_tag, "Type": "webappDistribution"},
+                                                                  opts=self.child_opts())
+
+            # CloudFront aliases cannot evaluate target health
+            alias_target = {
+                "name": cloudfront_distribution.domain_name,
+                "zone_id": cloudfront_distribution.hosted_zone_id,
+                "evaluate_target_health": False,
+            }
+
+            # IPv6 DNS Alias Record pointing to the distribution
+            route53.Record("dnsRecordIpv6",
+                           zone_id=hosted_zone_id,
+                           name=domain_name,
+                           type="AAAA",
+                           aliases=[alias_target],
+                           opts=self.child_opts())
+
+        # DNS Alias Record pointing to Load Balancer (or the CloudFront distribution)
+        dns_alias_record = route53.Record("dnsRecord",
+                                        zone_id=hosted_zone_id,
+                                        name=domain_name,
+                                        type="A",
+                                        aliases=[alias_target],
+                                          opts=self.child_opts()
+                                        )
+
+        exports = {f"{policy_name}_policy_arn": policy.arn for policy_name, policy in scaling_policies.items()}
+        exports["load_balancer_dns_name"] = load_balancer.dns_name
+        exports["dns_record"] = dns_alias_record.name
+        if cloudfront_enabled:
+            exports["cloudfront_domain_name"] = cloudfront_distribution.domain_name
+        self.finish(**exports)
@@ -0,0 +1,157 @@
+import re
+
+# MySQL parameter tuning for the RDS parameter group. Memory-dependent settings
+# are computed from the instance class, so moving to a bigger class retunes the
+# database on the next deployment. Profiles only decide the trade-offs: how
+# much memory goes to the buffer pool, how durable commits are and what gets
+# logged as slow.
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+# Memory of burstable classes by size (GiB); other families scale with vCPUs
+BURSTABLE_MEMORY_GIB = {
+    "micro": 1,
+    "small": 2,
+    "medium": 4,
+    "large": 8,
+    "xlarge": 16,
+    "2xlarge": 32,
+}
+VCPUS_BY_SIZE = {"large": 2, "xlarge": 4}
+# GiB of memory per vCPU for general purpose (m) and memory optimized (r, x) classes
+MEMORY_PER_VCPU_GIB = {"m": 4, "r": 8, "x": 16}
+
+# Memory per connection in the RDS default max_connections formula
+# (DBInstanceClassMemory/12582880)
+BYTES_PER_CONNECTION = 12582880
+MAX_CONNECTIONS_CAP = 16000
+
+# Parameters MySQL only picks up after a reboot
+STATIC_PARAMETERS = {"innodb_log_file_size"}
+
+PROFILES = {
+    # Full durability, moderate buffer pool, slow queries over 2s logged
+    "balanced": {
+        "buffer_pool_fraction": 0.75,
+        "connections_fraction": 1.0,
+        "flush_log_at_trx_commit": 1,
+        "long_query_time": 2,
+    },
+    # Most memory to the buffer pool, fewer connections
+    "read_heavy": {
+        "buffer_pool_fraction": 0.8,
+        "connections_fraction": 0.75,
+        "flush_log_at_trx_commit": 1,
+        "long_query_time": 1,
+    },
+    # Flushes the redo log once a second instead of on every commit; up to a
+    # second of transactions can be lost if the instance crashes
+    "write_heavy": {
+        "buffer_pool_fraction": 0.7,
+        "connections_fraction": 1.0,
+        "flush_log_at_trx_commit": 2,
+        "long_query_time": 2,
+    },
+}
+
+
+def instance_memory_bytes(instance_class):
+    """Return the memory of an RDS instance class in bytes.
+
+    >>> instance_memory_bytes("db.t3.micro") // GIB
+    1
+    >>> instance_memory_bytes("db.r6g.2xlarge") // GIB
+    64
+    """
+    match = re.fullmatch(r"db\.([a-z])(\d+)[a-z]*\.(\w+)", instance_class)
+    if not match:
+        raise ValueError(f"Unrecognized instance class {instance_class}")
+    family, _, size = match.groups()
+    if family == "t":
+        if size not in BURSTABLE_MEMORY_GIB:
+            raise ValueError(f"Unrecognized instance class {instance_class}")
+        return BURSTABLE_MEMORY_GIB[size] * GIB
+    if family not in MEMORY_PER_VCPU_GIB:
+        raise ValueError(f"No memory sizing for instance family {family} ({instance_class})")
+    size_match = re.fullmatch(r"(\d*)xlarge|large", size)
+    if not size_match:
+        raise ValueError(f"Unrecognized instance class {instance_class}")
+    vcpus = VCPUS_BY_SIZE.get(size) or int(size_match.group(1)) * VCPUS_BY_SIZE["xlarge"]
+    return vcpus * MEMORY_PER_VCPU_GIB[family] * GIB
+
+
+def _as_parameters(values):
+    return [{"name": name,
+             "value": str(value),
+             "apply_method": "pending-reboot" if name in STATIC_PARAMETERS else "immediate"}
+            for name, value in values.items()]
+
+
+def _profile_values(settings):
+    # Settings that do not depend on the instance's memory or storage
+    return {
+        "innodb_flush_log_at_trx_commit": settings["flush_log_at_trx_commit"],
+        "slow_query_log": 1,
+        "long_query_time": settings["long_query_time"],
+        "log_output": "FILE",
+        "log_queries_not_using_indexes": 0,
+    }
+
+
+def _profile_settings(profile):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown tuning profile {profile}, expected one of {sorted(PROFILES)}")
+    return PROFILES[profile]
+
+
+def _round_down(value, unit):
+    return max(unit, value // unit * unit)
+
+
+def tuning_parameters(instance_class, profile="balanced", storage_iops=3000):
+    """Return MySQL parameters tuned for instance_class under a named profile.
+
+    `storage_iops` is the provisioned (or gp3 baseline) IOPS of the volume
+    and sizes InnoDB's background flushing.
+
+    >>> params = {p["name"]: p["value"] for p in tuning_parameters("db.t3.medium")}
+    >>> params["innodb_buffer_pool_size"], params["max_connections"]
+    ('3221225472', '341')
+    >>> params["innodb_log_file_size"], params["innodb_flush_log_at_trx_commit"]
+    ('805306368', '1')
+    """
+    settings = _profile_settings(profile)
+    memory = instance_memory_bytes(instance_class)
+
+    # Small instances need more headroom for connections and the OS
+    buffer_pool_fraction = settings["buffer_pool_fraction"] if memory > 2 * GIB else 0.5
+    # Buffer pool size must be a multiple of the 128 MiB chunk size
+    buffer_pool = _round_down(int(memory * buffer_pool_fraction), 128 * MIB)
+    max_connections = min(MAX_CONNECTIONS_CAP, int(memory // BYTES_PER_CONNECTION * settings["connections_fraction"]))
+    # Redo log at a quarter of the buffer pool, capped to keep crash recovery short
+    log_file = min(2 * GIB, _round_down(buffer_pool // 4, 64 * MIB))
+
+    values = {
+        "innodb_buffer_pool_size": buffer_pool,
+        "max_connections": max_connections,
+        "innodb_log_file_size": log_file,
+        "innodb_io_capacity": max(200, storage_iops // 2),
+        "innodb_io_capacity_max": max(2000, storage_iops),
+        "table_open_cache": min(4000, max(400, max_connections * 4)),
+        **_profile_values(settings),
+    }
+    return _as_parameters(values)
+
+
+def cluster_parameters(profile="balanced"):
+    """Return the profile's parameters for an Aurora MySQL cluster.
+
+    Aurora sizes the buffer pool, redo log, IO capacity and connection limit
+    from the instance class or ACUs itself, so only the durability and
+    logging settings carry over.
+
+    >>> [p["name"] for p in cluster_parameters("write_heavy")][:2]
+    ['innodb_flush_log_at_trx_commit', 'slow_query_log']
+    """
+    return _as_parameters(_profile_values(_profile_settings(profile)))
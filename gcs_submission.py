@@ -0,0 +1,87 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import pulumi
+import pulumi_aws as aws
+from pulumi_gcp import serviceaccount
+from pulumi_gcp import storage
+
+# GCS submission pipeline: the bucket submissions are uploaded to, the service
+# account the Lambda uses to write to it, and the AWS secrets that hand both
+# over to the Lambda. Importing this module pulls in the GCP SDK, so the
+# program only imports it when the pipeline is enabled for the stack.
+
+
+def create_gcs_submission(gcp_project, labels, create_secrets=True, opts=None):
+    # Google Cloud Storage Bucket
+    bucket_gcs = storage.Bucket('bucket_submission_github',
+                                name='bucket-submission-github',
+                                location='US',
+                                storage_class='STANDARD',
+                                versioning=storage.BucketVersioningArgs(
+                                    enabled=True),
+                                uniform_bucket_level_access=True,
+                                labels=labels,
+                                force_destroy=True,
+                                opts=opts)
+
+    # Google Service Account
+    service_account_gcp = serviceaccount.Account('service_account',
+                                                 account_id='submission-service-account',
+                                                 display_name='Submission Service Account',
+                                                 project=gcp_project,
+                                                 opts=opts)
+
+    # Google Service Account Keys
+    service_account_keys_gcs = serviceaccount.Key('service_account_keys',
+                                                  service_account_id=service_account_gcp.name,
+                                                  public_key_type='TYPE_X509_PEM_FILE',
+                                                  opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=[service_account_gcp])))
+
+    # Grant the Storage Admin role to the service account
+    service_account_iam_binding_gcs = storage.BucketIAMBinding('service_account_storage_admin',
+                                                               bucket=bucket_gcs.name,
+                                                               role='roles/storage.admin',
+                                                               members=[pulumi.Output.concat("serviceAccount:", service_account_gcp.email)],
+                                                               opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=[service_account_gcp])))
+
+    # Decoded service account key JSON
+    service_account_key_json = service_account_keys_gcs.private_key.apply(
+        lambda key: base64.b64decode(key).decode('utf-8') if key else None)
+
+    pipeline = SimpleNamespace(bucket=bucket_gcs,
+                               service_account=service_account_gcp,
+                               service_account_keys=service_account_keys_gcs,
+                               service_account_key_json=service_account_key_json,
+                               iam_binding=service_account_iam_binding_gcs)
+
+    # The caller can bundle the key and bucket name into a secret of its own
+    if not create_secrets:
+        return pipeline
+
+    # Save the Service Account key in AWS Secrets Manager
+    service_account_secret = aws.secretsmanager.Secret("gcpServiceAccountKey",
+                                                       description="GCP Service Account Key",
+                                                       opts=opts)
+
+    service_account_secret_value = aws.secretsmanager.SecretVersion("gcpServiceAccountKeyValue",
+                                                                    secret_id=service_account_secret.id,
+                                                                    secret_string=service_account_key_json,
+                                                                    opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=[service_account_secret, service_account_keys_gcs])))
+
+    bucket_name_secret_gcs = aws.secretsmanager.Secret("gcsBucketNameSecret",
+                                                       description="GCS bucket name for file uploads",
+                                                       opts=opts)
+
+    bucket_name_secret_value_gcs = aws.secretsmanager.SecretVersion("gcsBucketNameSecretValue",
+                                                                    secret_id=bucket_name_secret_gcs.id,
+                                                                    secret_string=bucket_gcs.name.apply(
+                                                                        lambda name: json.dumps({"gcs_bucket_name": name})),
+                                                                    opts=pulumi.ResourceOptions.merge(opts, pulumi.ResourceOptions(depends_on=[bucket_name_secret_gcs])))
+
+    pipeline.service_account_secret = service_account_secret
+    pipeline.service_account_secret_value = service_account_secret_value
+    pipeline.bucket_name_secret = bucket_name_secret_gcs
+    pipeline.bucket_name_secret_value = bucket_name_secret_value_gcs
+    return pipeline
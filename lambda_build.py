@@ -0,0 +1,118 @@
+import base64
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+# Builds the submission Lambda's deployment artifacts inside the program:
+# the handler package from a source directory and a separate layer with its
+# third-party dependencies. Zips are deterministic (sorted entries, fixed
+# timestamps and permissions), so their hash only changes when their content
+# does, and an unchanged build leaves the function and layer untouched.
+
+BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build", "lambda")
+EXCLUDED_DIRS = {"__pycache__", ".pytest_cache", ".venv", "venv"}
+EXCLUDED_SUFFIXES = (".pyc", ".pyo")
+# Earliest timestamp a zip entry can carry
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def _collect_files(root, exclude=()):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            arcname = os.path.relpath(path, root).replace(os.sep, "/")
+            if filename.endswith(EXCLUDED_SUFFIXES) or arcname in exclude:
+                continue
+            files.append((arcname, path))
+    return sorted(files)
+
+
+def write_deterministic_zip(root, zip_path, exclude=()):
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for arcname, path in _collect_files(root, exclude):
+            info = zipfile.ZipInfo(arcname, date_time=ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            mode = 0o755 if os.access(path, os.X_OK) else 0o644
+            info.external_attr = (0o100000 | mode) << 16
+            with open(path, "rb") as f:
+                archive.writestr(info, f.read())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+
+def source_code_hash(path):
+    # Format Lambda uses for source_code_hash
+    return base64.b64encode(file_sha256(path).digest()).decode("utf-8")
+
+
+def _content_addressed(name, build):
+    # Build into a temp file, then keep it under a name derived from its hash
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=BUILD_DIR, suffix=".zip")
+    os.close(fd)
+    try:
+        build(tmp_path)
+        zip_path = os.path.join(BUILD_DIR, f"{name}-{file_sha256(tmp_path).hexdigest()[:16]}.zip")
+        os.replace(tmp_path, zip_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return zip_path
+
+
+def build_function_package(source_dir, requirements_file="requirements.txt"):
+    if not os.path.isdir(source_dir):
+        raise FileNotFoundError(f"Lambda source directory {source_dir} does not exist")
+    return _content_addressed(
+        "function", lambda zip_path: write_deterministic_zip(source_dir, zip_path, exclude={requirements_file}))
+
+
+def build_dependency_layer(requirements_path, runtime, architecture="x86_64"):
+    """Return the layer zip for requirements_path, or None without dependencies.
+
+    Layers are cached by their inputs, so pip only runs when the
+    requirements, runtime or architecture change.
+    """
+    if not os.path.exists(requirements_path):
+        return None
+    with open(requirements_path, "rb") as f:
+        requirements = f.read()
+    if not requirements.strip():
+        return None
+
+    key = hashlib.sha256(requirements + f"\0{runtime}\0{architecture}".encode("utf-8")).hexdigest()[:16]
+    # Remembers which layer zip these inputs produced
+    marker_path = os.path.join(BUILD_DIR, f"layer-inputs-{key}.txt")
+    if os.path.exists(marker_path):
+        with open(marker_path) as f:
+            layer_path = os.path.join(BUILD_DIR, f.read().strip())
+        if os.path.exists(layer_path):
+            return layer_path
+
+    python_version = runtime.replace("python", "")
+    platform = "manylinux2014_aarch64" if architecture == "arm64" else "manylinux2014_x86_64"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        subprocess.run([sys.executable, "-m", "pip", "install", "--quiet",
+                        "--requirement", requirements_path,
+                        "--target", os.path.join(tmp_dir, "python"),
+                        "--platform", platform,
+                        "--implementation", "cp",
+                        "--python-version", python_version,
+                        "--only-binary", ":all:",
+                        "--no-compile"],
+                       check=True)
+        layer_path = _content_addressed("layer", lambda zip_path: write_deterministic_zip(tmp_dir, zip_path))
+    with open(marker_path, "w") as f:
+        f.write(os.path.basename(layer_path))
+    return layer_path
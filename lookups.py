@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pulumi
+import pulumi_aws as aws
+
+# Data-source lookups used by the program. Every lookup is made at most once
+# per run, and can optionally be persisted to disk so that repeated
+# `pulumi preview` runs skip the provider round trip entirely.
+#
+# Stack config:
+#   lookup_cache_ttl      seconds a cached result stays valid (0 = no disk cache)
+#   lookup_cache_refresh  true to ignore cached results and fetch again
+# The PULUMI_LOOKUP_CACHE_REFRESH=1 environment variable forces a refresh too.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lookup-cache")
+
+_config = pulumi.Config()
+_memo = {}
+
+
+def _cache_settings():
+    ttl = _config.get_int("lookup_cache_ttl") or 0
+    refresh = (_config.get_bool("lookup_cache_refresh") or
+               os.environ.get("PULUMI_LOOKUP_CACHE_REFRESH", "") not in ("", "0", "false"))
+    return ttl, refresh
+
+
+def _cache_path():
+    region = pulumi.Config("aws").get("region") or "default"
+    return os.path.join(CACHE_DIR, f"{pulumi.get_stack()}-{region}.json")
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_cache(path, entries):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _lookup(name, fn, fields, opts=None, **kwargs):
+    key = name + ":" + hashlib.sha256(
+        json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    if key in _memo:
+        return _memo[key]
+
+    ttl, refresh = _cache_settings()
+    path = _cache_path() if ttl > 0 else None
+    entries = _load_cache(path) if path else {}
+    entry = entries.get(key)
+
+    if entry and not refresh and time.time() - entry["fetched_at"] < ttl:
+        values = entry["values"]
+    else:
+        result = fn(opts=opts, **kwargs) if opts else fn(**kwargs)
+        values = {field: getattr(result, field) for field in fields}
+        if path:
+            entries[key] = {"fetched_at": time.time(), "values": values}
+            _store_cache(path, entries)
+
+    _memo[key] = SimpleNamespace(**values)
+    return _memo[key]
+
+
+def get_caller_identity():
+    return _lookup("get_caller_identity", aws.get_caller_identity,
+                   ("account_id", "arn", "user_id"))
+
+
+def get_region():
+    return _lookup("get_region", aws.get_region, ("name",))
+
+
+def get_availability_zones():
+    return _lookup("get_availability_zones", aws.get_availability_zones,
+                   ("names", "zone_ids"))
+
+
+def _regional_provider(region):
+    key = f"provider:{region}"
+    if key not in _memo:
+        _memo[key] = aws.Provider(f"aws-{region}", region=region)
+    return _memo[key]
+
+
+def get_certificate(domain, region=None):
+    # `region` looks the certificate up outside the stack's region, e.g.
+    # us-east-1 for CloudFront
+    if region:
+        return _lookup(f"get_certificate@{region}", aws.acm.get_certificate,
+                       ("arn", "domain"),
+                       opts=pulumi.InvokeOptions(provider=_regional_provider(region)),
+                       domain=domain)
+    return _lookup("get_certificate", aws.acm.get_certificate,
+                   ("arn", "domain"), domain=domain)
+
+
+def get_ami(owners, name_pattern):
+    return _lookup("get_ami", aws.ec2.get_ami,
+                   ("id", "name", "root_device_name"),
+                   most_recent=True,
+                   owners=owners,
+                   filters=[{"name": "name", "values": [name_pattern]}])
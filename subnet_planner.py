@@ -0,0 +1,101 @@
+import ipaddress
+import math
+
+# Splits the VPC CIDR into one subnet per tier and AZ. Each tier is sized for
+# the addresses it is expected to use per AZ (instances, Lambda/endpoint ENIs,
+# load balancer nodes), multiplied by a growth factor and rounded up to a
+# power of two. Blocks are handed out largest first, which keeps every subnet
+# aligned on its own size without leaving gaps.
+
+# Addresses AWS keeps in every subnet (network, router, DNS, future, broadcast)
+AWS_RESERVED_ADDRESSES = 5
+# Smallest and largest subnet sizes AWS accepts
+MIN_PREFIX = 28
+MAX_PREFIX = 16
+
+# Expected addresses per AZ for the tiers the program knows about, the
+# least a tier is sized for
+DEFAULT_TIER_HOSTS = {
+    "public": 32,
+    "private": 64,
+    "data": 16,
+    "endpoints": 16,
+}
+
+
+def expected_tier_hosts(tiers, az_count, web_tier="public", web_instances=0, interface_endpoints=0):
+    """Return {tier: expected addresses per AZ} for a list of tier names.
+
+    The web tier holds up to `web_instances` instances (ASG max size plus
+    warm pool) spread over the AZs, the endpoints tier one ENI per interface
+    endpoint; every tier gets at least its DEFAULT_TIER_HOSTS.
+
+    >>> expected_tier_hosts(["public", "private"], 3, web_tier="private", web_instances=300)
+    {'public': 32, 'private': 100}
+    """
+    unknown = [tier for tier in tiers if tier not in DEFAULT_TIER_HOSTS]
+    if unknown:
+        raise ValueError(f"Unknown subnet tiers {unknown}, expected some of {list(DEFAULT_TIER_HOSTS)}")
+    demand = {web_tier: math.ceil(web_instances / az_count), "endpoints": interface_endpoints}
+    return {tier: max(DEFAULT_TIER_HOSTS[tier], demand.get(tier, 0)) for tier in tiers}
+
+
+def tier_prefix(hosts, growth_factor=2):
+    needed = math.ceil(hosts * growth_factor) + AWS_RESERVED_ADDRESSES
+    prefix = 32 - math.ceil(math.log2(max(needed, 2)))
+    return max(MAX_PREFIX, min(MIN_PREFIX, prefix))
+
+
+def find_overlaps(networks):
+    """Return pairs of overlapping networks, checking neighbours after a sort.
+
+    >>> find_overlaps([ipaddress.ip_network("10.0.0.0/24"), ipaddress.ip_network("10.0.0.128/25")])
+    [(IPv4Network('10.0.0.0/24'), IPv4Network('10.0.0.128/25'))]
+    """
+    overlaps = []
+    ordered = sorted(networks, key=lambda net: (net.network_address, -net.num_addresses))
+    widest = None
+    for net in ordered:
+        if widest is not None and net.network_address <= widest.broadcast_address:
+            overlaps.append((widest, net))
+        if widest is None or net.broadcast_address > widest.broadcast_address:
+            widest = net
+    return overlaps
+
+
+def plan_subnets(vpc_cidr, tiers, az_count, growth_factor=2):
+    """Return {tier: [subnet CIDR per AZ]} carved out of vpc_cidr.
+
+    `tiers` maps tier name to expected addresses per AZ; a list of tier
+    names uses DEFAULT_TIER_HOSTS (see expected_tier_hosts to size them).
+
+    >>> plan = plan_subnets("10.0.0.0/16", ["public", "private"], 3)
+    >>> plan["private"]
+    ['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24']
+    >>> plan["public"]
+    ['10.0.3.0/25', '10.0.3.128/25', '10.0.4.0/25']
+    """
+    vpc = ipaddress.ip_network(vpc_cidr)
+    if not isinstance(tiers, dict):
+        tiers = expected_tier_hosts(tiers, az_count)
+
+    blocks = [(tier_prefix(hosts, growth_factor), order, tier, az)
+              for order, (tier, hosts) in enumerate(tiers.items())
+              for az in range(az_count)]
+    # Largest blocks first (smallest prefix), then in tier and AZ order
+    blocks.sort()
+
+    plan = {tier: [None] * az_count for tier in tiers}
+    cursor = int(vpc.network_address)
+    for prefix, _, tier, az in blocks:
+        size = 2 ** (32 - prefix)
+        subnet = ipaddress.ip_network((cursor, prefix))
+        if subnet.broadcast_address > vpc.broadcast_address:
+            raise ValueError(f"{vpc_cidr} is too small for {len(blocks)} subnets across tiers {list(tiers)}")
+        plan[tier][az] = str(subnet)
+        cursor += size
+
+    overlaps = find_overlaps([ipaddress.ip_network(cidr) for cidrs in plan.values() for cidr in cidrs])
+    if overlaps:
+        raise ValueError(f"Planned subnets overlap: {overlaps}")
+    return plan
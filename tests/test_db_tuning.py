@@ -0,0 +1,105 @@
+import pytest
+
+from db_tuning import GIB, MIB, PROFILES, cluster_parameters, instance_memory_bytes, tuning_parameters
+
+
+def _values(parameters):
+    return {parameter["name"]: parameter["value"] for parameter in parameters}
+
+
+@pytest.mark.parametrize("instance_class, memory_gib", [
+    ("db.t3.micro", 1),
+    ("db.t4g.large", 8),
+    ("db.m5.large", 8),
+    ("db.r6g.large", 16),
+    ("db.m5.2xlarge", 32),
+    ("db.x2g.xlarge", 64),
+])
+def test_instance_memory(instance_class, memory_gib):
+    assert instance_memory_bytes(instance_class) == memory_gib * GIB
+
+
+@pytest.mark.parametrize("instance_class", ["db.t3.huge", "db.z1d.large", "db.r6g.metal", "t3.micro"])
+def test_unrecognized_instance_class(instance_class):
+    with pytest.raises(ValueError):
+        instance_memory_bytes(instance_class)
+
+
+def test_small_instance_keeps_half_its_memory_out_of_the_buffer_pool():
+    values = _values(tuning_parameters("db.t3.micro", "read_heavy"))
+
+    assert values["innodb_buffer_pool_size"] == str(512 * MIB)
+    assert values["innodb_log_file_size"] == str(128 * MIB)
+    # 1 GiB / 12582880 bytes per connection, three quarters of it
+    assert values["max_connections"] == "63"
+    assert values["table_open_cache"] == "400"
+
+
+@pytest.mark.parametrize("profile, instance_class, expected", [
+    ("balanced", "db.t3.medium", {
+        "innodb_buffer_pool_size": str(3 * GIB),
+        "max_connections": "341",
+        "innodb_log_file_size": str(768 * MIB),
+        "innodb_flush_log_at_trx_commit": "1",
+        "long_query_time": "2",
+    }),
+    ("read_heavy", "db.r6g.large", {
+        # 80% of 16 GiB, rounded down to the 128 MiB chunk size
+        "innodb_buffer_pool_size": str(102 * 128 * MIB),
+        "max_connections": "1023",
+        "innodb_log_file_size": str(2 * GIB),
+        "innodb_flush_log_at_trx_commit": "1",
+        "long_query_time": "1",
+    }),
+    ("write_heavy", "db.m5.2xlarge", {
+        "innodb_buffer_pool_size": str(179 * 128 * MIB),
+        "max_connections": "2730",
+        "innodb_log_file_size": str(2 * GIB),
+        "innodb_flush_log_at_trx_commit": "2",
+        "long_query_time": "2",
+    }),
+])
+def test_profile_parameters(profile, instance_class, expected):
+    values = _values(tuning_parameters(instance_class, profile))
+
+    assert {name: values[name] for name in expected} == expected
+
+
+def test_io_capacity_follows_storage_iops():
+    values = _values(tuning_parameters("db.m5.large", storage_iops=12000))
+
+    assert (values["innodb_io_capacity"], values["innodb_io_capacity_max"]) == ("6000", "12000")
+    # gp3 baseline IOPS keep the floors
+    values = _values(tuning_parameters("db.m5.large"))
+    assert (values["innodb_io_capacity"], values["innodb_io_capacity_max"]) == ("1500", "3000")
+
+
+def test_only_the_redo_log_size_waits_for_a_reboot():
+    parameters = tuning_parameters("db.m5.large")
+
+    assert [p["name"] for p in parameters if p["apply_method"] == "pending-reboot"] == ["innodb_log_file_size"]
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_aurora_cluster_gets_only_the_profile_settings(profile):
+    cluster = _values(cluster_parameters(profile))
+    instance = _values(tuning_parameters("db.r6g.large", profile))
+
+    assert cluster == {
+        "innodb_flush_log_at_trx_commit": str(PROFILES[profile]["flush_log_at_trx_commit"]),
+        "slow_query_log": "1",
+        "long_query_time": str(PROFILES[profile]["long_query_time"]),
+        "log_output": "FILE",
+        "log_queries_not_using_indexes": "0",
+    }
+    # The memory, redo log, IO and connection settings Aurora sizes itself stay MySQL only
+    assert set(instance) - set(cluster) == {
+        "innodb_buffer_pool_size", "max_connections", "innodb_log_file_size",
+        "innodb_io_capacity", "innodb_io_capacity_max", "table_open_cache",
+    }
+    assert all(instance[name] == value for name, value in cluster.items())
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match="Unknown tuning profile"):
+        cluster_parameters("fastest")
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from tools.bench import BASELINE, SCENARIOS
+from tools.mocks import run_program
+
+# Every data source is looked up once per evaluation, however many
+# resources use it
+EXPECTED_INVOKES = {
+    "aws:index/getCallerIdentity:getCallerIdentity": 1,
+    "aws:index/getRegion:getRegion": 1,
+    "aws:index/getAvailabilityZones:getAvailabilityZones": 1,
+    "aws:acm/getCertificate:getCertificate": 1,
+    "aws:ec2/getAmi:getAmi": 1,
+}
+
+# The tools.bench scenarios plus configs that take other paths through Output.apply
+CONFIGS = {
+    **SCENARIOS,
+    "submission_queue": {"submission_queue": "true", "lambda_provisioned_concurrency": "2"},
+    "bundled_secret": {"lambda_bundled_secret": "true"},
+}
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGS))
+def test_evaluation_counts(name):
+    mocks = run_program(config=CONFIGS[name])
+
+    assert mocks.registered_in_apply == []
+    assert dict(mocks.invoke_counts()) == EXPECTED_INVOKES
+    if name in SCENARIOS:
+        # Counts are deterministic, unlike the timings tools.bench also records
+        with open(BASELINE) as f:
+            baseline = json.load(f)[name]
+        assert len(mocks.resources) == baseline["resources"]
+        assert baseline["invoke_counts"] == EXPECTED_INVOKES
+
+
+def test_subnet_tiers_must_include_public_and_private():
+    with pytest.raises(ValueError, match=r"missing the required tiers \['public'\]"):
+        run_program(config={"subnet_tiers": '{"private": 64, "data": 16}'})
@@ -0,0 +1,67 @@
+import ipaddress
+
+import pytest
+
+from subnet_planner import DEFAULT_TIER_HOSTS, expected_tier_hosts, find_overlaps, plan_subnets, tier_prefix
+
+
+def _networks(plan):
+    return [ipaddress.ip_network(cidr) for cidrs in plan.values() for cidr in cidrs]
+
+
+def test_vpc_too_small_for_tiers():
+    with pytest.raises(ValueError, match="too small"):
+        plan_subnets("10.0.0.0/24", ["public", "private", "data", "endpoints"], 3)
+
+
+def test_more_than_three_azs():
+    plan = plan_subnets("10.0.0.0/16", ["public", "private", "data", "endpoints"], 6)
+
+    assert all(len(cidrs) == 6 for cidrs in plan.values())
+    networks = _networks(plan)
+    assert len(set(networks)) == len(networks)
+    assert find_overlaps(networks) == []
+    vpc = ipaddress.ip_network("10.0.0.0/16")
+    assert all(network.subnet_of(vpc) for network in networks)
+
+
+def test_optional_tiers_left_out():
+    plan = plan_subnets("10.0.0.0/16", ["public", "private"], 3)
+
+    assert set(plan) == {"public", "private"}
+
+
+def test_custom_tier_sizes_follow_tier_order_on_ties():
+    plan = plan_subnets("10.0.0.0/20", {"public": 16, "private": 16, "data": 16}, 2)
+
+    # Equal sizes are handed out in tier order, then AZ order
+    assert plan == {
+        "public": ["10.0.0.0/26", "10.0.0.64/26"],
+        "private": ["10.0.0.128/26", "10.0.0.192/26"],
+        "data": ["10.0.1.0/26", "10.0.1.64/26"],
+    }
+
+
+def test_tier_prefix_is_clamped_to_aws_limits():
+    assert tier_prefix(1) == 28
+    assert tier_prefix(10 ** 6) == 16
+
+
+def test_tier_names_are_sized_for_web_instances_and_endpoints():
+    hosts = expected_tier_hosts(["public", "private", "endpoints"], 3,
+                                web_tier="private", web_instances=301, interface_endpoints=20)
+
+    # 301 instances over 3 AZs need 101 addresses per AZ
+    assert hosts == {"public": 32, "private": 101, "endpoints": 20}
+    assert tier_prefix(hosts["private"]) == 24
+
+
+def test_small_demand_keeps_default_tier_sizes():
+    hosts = expected_tier_hosts(list(DEFAULT_TIER_HOSTS), 3, web_instances=3, interface_endpoints=2)
+
+    assert hosts == DEFAULT_TIER_HOSTS
+
+
+def test_unknown_tier_name():
+    with pytest.raises(ValueError, match="Unknown subnet tiers"):
+        plan_subnets("10.0.0.0/16", ["public", "private", "cache"], 3)
@@ -0,0 +1,72 @@
+import base64
+import re
+
+import pytest
+
+import user_data
+from tools.mocks import run_program
+
+ENV = {"DB_HOST": "db.local", "DB_PASSWORD": "s3cret", "SNS_TOPIC_ARN": "arn:aws:sns:us-east-1:1:topic"}
+READINESS_CHECKS = [
+    ("database", user_data.tcp_check("db.local", 3306)),
+    ("sns", "aws sns get-topic-attributes --topic-arn arn:aws:sns:us-east-1:1:topic"),
+]
+
+
+def _phases(script):
+    # Phase name -> its lines, in the order the script runs them
+    phases = {}
+    for block in script.split("\n# Phase: ")[1:]:
+        name, *lines = block.split("\n\n")[0].splitlines()
+        phases[name] = lines
+    return phases
+
+
+def _launch_template_user_data(config):
+    mocks = run_program(config=config)
+    [launch_template] = [args for args in mocks.resources if args.name == "launchTemplate"]
+    # The script holds the database password, so the input is a secret
+    return base64.b64decode(launch_template.inputs["userData"]["value"]).decode()
+
+
+def test_phases_run_in_order_and_report_their_duration():
+    extra_phase = user_data.lifecycle_hook_phase("us-east-1", "auto-scaling-group", "webapp-initialized")
+    script = user_data.render_boot_script(ENV, "us-east-1", READINESS_CHECKS, extra_phases=[extra_phase])
+
+    phases = _phases(script)
+    assert list(phases) == ["environment", "cloudwatch_agent", "readiness", "webapp_start", "lifecycle_hook"]
+    for name, lines in phases.items():
+        assert lines[-1] == f"phase_done {name}"
+    assert script.count("phase_done ") == len(phases)
+    assert "--metric-name PhaseSeconds" in script
+
+
+def test_readiness_phase_waits_for_each_check_before_the_webapp_starts():
+    script = user_data.render_boot_script(ENV, "us-east-1", READINESS_CHECKS, readiness_timeout=120)
+
+    readiness = _phases(script)["readiness"]
+    assert readiness[:-1] == [
+        "wait_for database timeout 3 bash -c '</dev/tcp/db.local/3306'",
+        "wait_for sns aws sns get-topic-attributes --topic-arn arn:aws:sns:us-east-1:1:topic",
+    ]
+    assert "READINESS_TIMEOUT=120" in script
+    assert "sleep 30" not in script
+
+
+def test_env_file_is_written_atomically_and_secrets_are_not_logged():
+    script = user_data.render_boot_script(ENV, "us-east-1", log_keys=["DB_HOST"])
+
+    environment = _phases(script)["environment"]
+    encoded = re.match(r"echo (\S+) \| base64 -d", environment[0]).group(1)
+    assert base64.b64decode(encoded).decode() == user_data.render_env_file(ENV)
+    assert environment[2] == f"sudo mv -f {user_data.ENV_FILE}.tmp {user_data.ENV_FILE}"
+    assert "DB_HOST=db.local" in script
+    assert "s3cret" not in script
+
+
+@pytest.mark.parametrize("warm_pool_size", [None, "1"])
+def test_lifecycle_hook_phase_only_with_a_warm_pool(warm_pool_size):
+    script = _launch_template_user_data({"warm_pool_size": warm_pool_size} if warm_pool_size else {})
+
+    assert ("lifecycle_hook" in _phases(script)) == bool(warm_pool_size)
+    assert ("webapp-lifecycle-hook.service" in script) == bool(warm_pool_size)
@@ -0,0 +1,34 @@
+import pytest
+
+from components.web import LB_PROFILES
+from tools.mocks import run_program
+
+
+def _target_group_inputs(config):
+    mocks = run_program(config=config)
+    [target_group] = [args for args in mocks.resources if args.name == "target-group"]
+    return target_group.inputs
+
+
+def test_profiles_have_the_same_settings():
+    assert all(set(settings) == set(LB_PROFILES["default"]) for settings in LB_PROFILES.values())
+
+
+def test_profile_with_overrides_reaches_the_target_group():
+    inputs = _target_group_inputs({"load_balancer_profile": "performance",
+                                   "load_balancer_settings": '{"slow_start": 90}'})
+
+    performance = LB_PROFILES["performance"]
+    assert inputs["loadBalancingAlgorithmType"] == performance["algorithm"]
+    assert inputs["deregistrationDelay"] == performance["deregistration_delay"]
+    assert inputs["healthCheck"]["interval"] == performance["health_check_interval"]
+    assert inputs["slowStart"] == 90
+
+
+@pytest.mark.parametrize("config, message", [
+    ({"load_balancer_profile": "fastest"}, "Unknown load_balancer_profile"),
+    ({"load_balancer_settings": '{"keepalive": 5}'}, "Unknown load_balancer_settings"),
+])
+def test_unknown_profile_or_setting(config, message):
+    with pytest.raises(ValueError, match=message):
+        run_program(config=config)
@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from tools.mocks import PROJECT_DIR, run_program
+
+# Benchmarks evaluating the program in-process under mocks and compares the
+# results with a stored baseline. Resource and per-token invoke counts are
+# deterministic and must match (tests/test_evaluation.py asserts them too);
+# timings and memory depend on the machine, so a slowdown beyond the
+# tolerance is only reported unless --fail-on-timing is given, e.g. on a
+# dedicated runner whose own results are the baseline. Unlike
+# tools.bench_startup it measures warm runs: imports are paid by a warm-up
+# run that is not counted.
+
+BASELINE = os.path.join(PROJECT_DIR, "tools", "bench_baseline.json")
+
+# Stack config overrides each benchmarked scenario runs with
+SCENARIOS = {
+    "default": {},
+    "full": {
+        "subnet_tiers": '{"public": 32, "private": 64, "data": 16, "endpoints": 16}',
+        "nat_gateway_mode": "per_az",
+        "web_subnet_tier": "private",
+        "vpc_gateway_endpoints": '["s3", "dynamodb"]',
+        "vpc_interface_endpoints": '["sns", "secretsmanager"]',
+        "db_read_replicas": "2",
+        "rds_proxy": "true",
+        "submission_queue": "true",
+        "warm_pool_size": "1",
+        "scaling_request_count_target": "200",
+        "scaling_burst_threshold": "500",
+        "load_balancer_profile": "performance",
+        "cloudfront": "true",
+        "cloudfront_cache_paths": '{"/static/*": 86400}',
+    },
+    "aurora": {
+        "db_engine": "aurora-serverless",
+        "db_read_replicas": "1",
+        "enable_gcs_submission": "false",
+    },
+}
+
+# Measurements compared with a relative tolerance; counts must match exactly
+TIMED = ("wall_s", "evaluate_s", "resolve_s")
+COUNTED = ("resources", "invoke_counts")
+# Timing differences below this are noise on sub-second runs
+TIMING_SLACK_S = 0.05
+
+
+def measure(stack, config, runs):
+    """Return the median timings, peak traced memory and counts of `runs` evaluations."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        mocks = run_program(stack, config)
+        samples.append({"wall_s": time.perf_counter() - started, **mocks.timings})
+
+    # A separate run under tracemalloc, which would otherwise slow the timed ones down
+    tracemalloc.start()
+    try:
+        mocks = run_program(stack, config)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {key: round(statistics.median(sample[key] for sample in samples), 4) for key in TIMED}
+    result["peak_mib"] = round(peak / 1024 ** 2, 2)
+    result["resources"] = len(mocks.resources)
+    result["invoke_counts"] = dict(sorted(mocks.invoke_counts().items()))
+    return result
+
+
+def compare(result, baseline, tolerance):
+    """Return (count changes, timing regressions) of `result` against `baseline`.
+
+    >>> compare({"wall_s": 1.4, "resolve_s": 0.08, "peak_mib": 10, "resources": 5, "invoke_counts": {"a": 1}},
+    ...         {"wall_s": 1.0, "resolve_s": 0.05, "peak_mib": 10, "resources": 4, "invoke_counts": {"a": 1}}, 0.25)
+    (['resources 5 != 4'], ['wall_s 1.4 > 1.0 (+40%)'])
+    """
+    counts = [f"{key} {result[key]} != {baseline[key]}"
+              for key in COUNTED if key in baseline and result[key] != baseline[key]]
+    timings = []
+    for key in TIMED + ("peak_mib",):
+        slack = TIMING_SLACK_S if key in TIMED else 0
+        if key in result and key in baseline and result[key] > baseline[key] * (1 + tolerance) + slack:
+            timings.append(f"{key} {result[key]} > {baseline[key]} "
+                           f"(+{(result[key] / baseline[key] - 1) * 100:.0f}%)")
+    return counts, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark program evaluation under mocks against a baseline")
+    parser.add_argument("--stack", default="dev")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run, may be repeated (default: all)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative increase of timings and memory (default 0.25)")
+    parser.add_argument("--fail-on-timing", action="store_true",
+                        help="exit non-zero on timing or memory regressions too, not only count changes")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    # Warm-up run, so module imports are not counted against the first scenario
+    run_program(args.stack)
+
+    results = {}
+    failed = False
+    print(f"{'scenario':<10} {'wall s':>8} {'evaluate s':>11} {'resolve s':>10} {'peak MiB':>9} "
+          f"{'resources':>10} {'invokes':>8}")
+    for scenario in args.scenario or sorted(SCENARIOS):
+        result = results[scenario] = measure(args.stack, SCENARIOS[scenario], args.runs)
+        print(f"{scenario:<10} {result['wall_s']:>8.3f} {result['evaluate_s']:>11.3f} "
+              f"{result['resolve_s']:>10.3f} {result['peak_mib']:>9.1f} "
+              f"{result['resources']:>10} {sum(result['invoke_counts'].values()):>8}")
+        if not args.update and scenario in baselines:
+            counts, timings = compare(result, baselines[scenario], args.tolerance)
+            for change in counts:
+                print(f"  changed: {change}")
+            for regression in timings:
+                print(f"  {'regression' if args.fail_on_timing else 'warning'}: {regression}")
+            failed = failed or bool(counts) or (args.fail_on_timing and bool(timings))
+
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump({**baselines, **results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {os.path.relpath(args.baseline, PROJECT_DIR)}")
+    elif failed:
+        print("evaluation regressed; if the change is intended, rerun with --update")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from tools.mocks import PROJECT_DIR
+
+# Compares how long the program takes to import its dependencies and evaluate
+# under mocks with the GCS submission pipeline switched on and off. Each
+# sample runs in a fresh interpreter under -X importtime, so the time spent
+# importing pulumi_gcp (what switching the pipeline off saves) is reported
+# on its own.
+
+
+def _child(stack, enable_gcs):
+    from tools.mocks import run_program
+    started = time.perf_counter()
+    mocks = run_program(stack, {"enable_gcs_submission": str(enable_gcs).lower()})
+    finished = time.perf_counter()
+    print(json.dumps({
+        "evaluate_s": finished - started,
+        "resources": len(mocks.resources),
+        "gcp_loaded": "pulumi_gcp" in sys.modules,
+    }))
+
+
+def gcp_import_seconds(importtime_log):
+    """Sum the self time of every pulumi_gcp module in -X importtime output.
+
+    >>> gcp_import_seconds("import time: self [us] | cumulative | imported package\\n"
+    ...                    "import time:      1500 |       4000 |   pulumi_gcp.storage\\n"
+    ...                    "import time:       500 |        500 |     pulumi\\n"
+    ...                    "import time:      2500 |       6500 | pulumi_gcp\\n")
+    0.004
+    """
+    total_us = 0
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, package = line[len("import time:"):].split("|")
+        if package.strip().split(".")[0] == "pulumi_gcp":
+            total_us += int(self_us)
+    return total_us / 1e6
+
+
+def _sample(stack, enable_gcs):
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-m", "tools.bench_startup", "--child",
+                              "--stack", stack, "--gcs", str(enable_gcs).lower()],
+                             cwd=PROJECT_DIR, check=True, capture_output=True, text=True)
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - started
+    result["gcp_import_s"] = gcp_import_seconds(process.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time with and without the GCS pipeline")
+    parser.add_argument("--stack", default="dev")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--gcs", default="true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.stack, args.gcs == "true")
+        return
+
+    print(f"{'enable_gcs_submission':<22} {'process s':>10} {'evaluate s':>11} {'gcp import s':>13} "
+          f"{'resources':>10} {'pulumi_gcp':>11}")
+    for enable_gcs in (True, False):
+        samples = [_sample(args.stack, enable_gcs) for _ in range(args.runs)]
+        print(f"{str(enable_gcs).lower():<22} "
+              f"{statistics.median(s['process_s'] for s in samples):>10.3f} "
+              f"{statistics.median(s['evaluate_s'] for s in samples):>11.3f} "
+              f"{statistics.median(s['gcp_import_s'] for s in samples):>13.3f} "
+              f"{samples[0]['resources']:>10} "
+              f"{'loaded' if samples[0]['gcp_loaded'] else 'skipped':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+from collections import defaultdict, deque
+
+from tools.mocks import run_program
+
+# Builds the resource dependency graph of the program from the implicit
+# (input) and explicit (depends_on) edges recorded under mocks, reports the
+# longest create chain weighted by typical per-type create times, and flags
+# depends_on edges that the rest of the graph already implies.
+
+# Rough create times in seconds, from observed `pulumi up` runs
+TYPICAL_CREATE_SECONDS = {
+    "aws:rds/instance:Instance": 420,
+    "aws:rds/cluster:Cluster": 300,
+    "aws:rds/clusterInstance:ClusterInstance": 420,
+    "aws:rds/proxy:Proxy": 240,
+    "aws:cloudfront/distribution:Distribution": 300,
+    "aws:lb/loadBalancer:LoadBalancer": 180,
+    "aws:ec2/natGateway:NatGateway": 120,
+    "aws:ec2/vpcEndpoint:VpcEndpoint": 90,
+    "aws:autoscaling/group:Group": 60,
+    "aws:lambda/function:Function": 20,
+    "aws:lambda/provisionedConcurrencyConfig:ProvisionedConcurrencyConfig": 90,
+    "aws:dynamodb/table:Table": 15,
+    "aws:ec2/internetGateway:InternetGateway": 10,
+    "aws:ec2/vpc:Vpc": 10,
+    "aws:ec2/subnet:Subnet": 10,
+    "aws:ec2/securityGroup:SecurityGroup": 5,
+    "aws:iam/role:Role": 3,
+    "aws:iam/instanceProfile:InstanceProfile": 10,
+    "gcp:serviceaccount/account:Account": 5,
+    "gcp:storage/bucket:Bucket": 3,
+}
+DEFAULT_CREATE_SECONDS = 2
+
+
+def _short(urn):
+    return urn.split("::")[-1]
+
+
+def build_graph(mocks):
+    # urn -> set of urns it depends on, split by where the edge came from
+    urns = {key: reg["urn"] for key, reg in mocks.registrations.items()
+            if not key[0].startswith("pulumi:providers:")}
+    implicit = {}
+    explicit = {}
+    for key, urn in urns.items():
+        reg = mocks.registrations[key]
+        implicit[urn] = {dep for deps in reg["property_dependencies"].values()
+                         for dep in deps if dep in urns.values()}
+        explicit[urn] = {urns[dep] for dep in mocks.explicit_dependencies.get(key, []) if dep in urns}
+    types = {urn: key[0] for key, urn in urns.items()}
+    return types, implicit, explicit
+
+
+def critical_path(types, edges):
+    # Longest path through the DAG where each node costs its create time
+    indegree = {urn: 0 for urn in edges}
+    dependents = defaultdict(list)
+    for urn, deps in edges.items():
+        for dep in deps:
+            dependents[dep].append(urn)
+            indegree[urn] += 1
+
+    finish = {}
+    previous = {}
+    queue = deque(urn for urn, degree in indegree.items() if degree == 0)
+    while queue:
+        urn = queue.popleft()
+        start = max((finish[dep] for dep in edges[urn]), default=0)
+        previous[urn] = max(edges[urn], key=finish.get, default=None)
+        finish[urn] = start + TYPICAL_CREATE_SECONDS.get(types[urn], DEFAULT_CREATE_SECONDS)
+        for dependent in dependents[urn]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                queue.append(dependent)
+
+    path = []
+    urn = max(finish, key=finish.get, default=None)
+    while urn is not None:
+        path.append((urn, finish[urn]))
+        urn = previous[urn]
+    return list(reversed(path))
+
+
+def _reachable(edges, source, target, skip_edge):
+    seen = set()
+    stack = [dep for dep in edges[source] if (source, dep) != skip_edge]
+    while stack:
+        urn = stack.pop()
+        if urn == target:
+            return True
+        if urn not in seen:
+            seen.add(urn)
+            stack.extend(edges[urn])
+    return False
+
+
+def redundant_edges(implicit, explicit):
+    # depends_on edges that an input already creates, or that follow
+    # transitively from the other edges
+    edges = {urn: implicit[urn] | explicit[urn] for urn in implicit}
+    redundant = []
+    for urn, deps in sorted(explicit.items()):
+        for dep in sorted(deps):
+            if dep in implicit[urn]:
+                redundant.append((urn, dep, "already an input"))
+            elif _reachable(edges, urn, dep, skip_edge=(urn, dep)):
+                redundant.append((urn, dep, "implied transitively"))
+    return redundant
+
+
+def profile(stack="dev", config=None):
+    mocks = run_program(stack, config)
+    types, implicit, explicit = build_graph(mocks)
+    edges = {urn: implicit[urn] | explicit[urn] for urn in implicit}
+    path = critical_path(types, edges)
+    return {
+        "resources": len(edges),
+        "edges": sum(len(deps) for deps in edges.values()),
+        "critical_path_seconds": path[-1][1] if path else 0,
+        "critical_path": [
+            {"resource": _short(urn), "finishes_at": finish,
+             "explicit_only": i > 0 and path[i - 1][0] in explicit[urn] - implicit[urn]}
+            for i, (urn, finish) in enumerate(path)
+        ],
+        "redundant_depends_on": [
+            {"resource": _short(urn), "depends_on": _short(dep), "reason": reason}
+            for urn, dep, reason in redundant_edges(implicit, explicit)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical-path and redundant depends_on report")
+    parser.add_argument("--stack", default="dev")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = profile(args.stack, dict(item.split("=", 1) for item in args.config))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['resources']} resources, {report['edges']} dependency edges")
+    print(f"critical path: ~{report['critical_path_seconds']}s")
+    for step in report["critical_path"]:
+        marker = "  (depends_on only)" if step["explicit_only"] else ""
+        print(f"  {step['finishes_at']:5d}s  {step['resource']}{marker}")
+    print(f"redundant depends_on edges: {len(report['redundant_depends_on'])}")
+    for edge in report["redundant_depends_on"]:
+        print(f"  {edge['resource']} -> {edge['depends_on']}  ({edge['reason']})")
+
+
+if __name__ == "__main__":
+    main()
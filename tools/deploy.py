@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from pulumi import automation as auto
+
+from tools.mocks import PROJECT_DIR, PROJECT_NAME, load_stack_config
+
+# Runs preview, up or refresh for several stacks of this project at once
+# through the Automation API, so a release takes as long as the slowest
+# stack instead of the sum of all of them. Each stack runs in its own
+# thread (the Automation API drives the pulumi CLI synchronously); engine
+# events are handed back to the event loop, streamed as JSON lines and
+# turned into a per-resource timing report.
+#
+# With `up`, a stack that reads layer outputs from another selected stack
+# (layer_stacks) waits until that stack has been updated.
+
+# EngineEvent fields, one of which is set on each event
+EVENT_KINDS = ("prelude_event", "resource_pre_event", "res_outputs_event", "res_op_failed_event",
+               "diagnostic_event", "stdout_event", "summary_event", "policy_event", "cancel_event")
+
+
+def project_stacks():
+    """Return the stacks with a Pulumi.<stack>.yaml in the project."""
+    return sorted(os.path.basename(path)[len("Pulumi."):-len(".yaml")]
+                  for path in glob.glob(os.path.join(PROJECT_DIR, "Pulumi.*.yaml")))
+
+
+def layer_stack_dependencies(stack, stacks):
+    # Stacks among `stacks` that `stack` reads layer outputs from
+    value = load_stack_config(stack).get(f"{PROJECT_NAME}:layer_stacks")
+    referenced = json.loads(value).values() if value else []
+    return sorted({name.split("/")[-1] for name in referenced} & set(stacks) - {stack})
+
+
+def parse_parallel(values):
+    """Return (default, per-stack) parallelism from N and STACK=N values.
+
+    >>> parse_parallel(["8", "demo=2"])
+    (8, {'demo': 2})
+    """
+    default, per_stack = None, {}
+    for value in values:
+        stack, _, limit = value.rpartition("=")
+        if stack:
+            per_stack[stack] = int(limit)
+        else:
+            default = int(limit)
+    return default, per_stack
+
+
+def stack_targets(stack, targets):
+    """Return the target URNs that belong to `stack` (URN stack segments may be globs).
+
+    >>> stack_targets("demo", ["urn:pulumi:demo::iac-pulumi::aws:lb/listener:Listener::listener",
+    ...                        "urn:pulumi:dev::iac-pulumi::aws:ec2/vpc:Vpc::vpc",
+    ...                        "urn:pulumi:*::iac-pulumi::aws:autoscaling/group:Group::autoScalingGroup"])
+    ['urn:pulumi:demo::iac-pulumi::aws:lb/listener:Listener::listener', 'urn:pulumi:*::iac-pulumi::aws:autoscaling/group:Group::autoScalingGroup']
+    """
+    return [urn for urn in targets if fnmatch.fnmatchcase(stack, urn.split("::")[0].split(":")[-1])]
+
+
+def event_record(stack, event):
+    # A JSON-serializable summary of an engine event
+    for kind in EVENT_KINDS:
+        payload = getattr(event, kind)
+        if payload is not None:
+            break
+    else:
+        kind, payload = "unknown_event", None
+    record = {"stack": stack, "sequence": event.sequence, "timestamp": event.timestamp,
+              "kind": kind[:-len("_event")]}
+    metadata = getattr(payload, "metadata", None)
+    if metadata is not None:
+        record.update(urn=metadata.urn, type=metadata.type, op=metadata.op.value)
+        if metadata.diffs:
+            record["diffs"] = metadata.diffs
+    if kind == "diagnostic_event":
+        record.update(severity=payload.severity, urn=payload.urn, message=payload.message.strip())
+    elif kind == "stdout_event":
+        record["message"] = payload.message.strip()
+    elif kind == "summary_event":
+        record.update(duration_seconds=payload.duration_seconds,
+                      resource_changes={op.value if hasattr(op, "value") else op: count
+                                        for op, count in payload.resource_changes.items()})
+    return record
+
+
+def resource_timings(events):
+    """Return the resource steps of a run with their duration, slowest first.
+
+    `events` are (monotonic receive time, event record) pairs; a step runs
+    from its "resource_pre" event to its "res_outputs" or "res_op_failed" event.
+    """
+    started = {}
+    steps = []
+    for received, record in events:
+        if record["kind"] == "resource_pre":
+            started[record["urn"]] = (received, record)
+        elif record["kind"] in ("res_outputs", "res_op_failed") and record.get("urn") in started:
+            began, pre = started.pop(record["urn"])
+            steps.append(SimpleNamespace(urn=pre["urn"], type=pre["type"], op=pre["op"],
+                                         seconds=received - began,
+                                         failed=record["kind"] == "res_op_failed"))
+    return sorted(steps, key=lambda step: step.seconds, reverse=True)
+
+
+async def run_stack(stack, command, options, emit, wait_for=()):
+    """Run `command` on `stack` in a worker thread and return its outcome."""
+    for dependency in wait_for:
+        if not (await dependency).ok:
+            return SimpleNamespace(stack=stack, ok=False, seconds=0.0, changes={}, steps=[],
+                                   error="skipped: a stack it reads layer outputs from failed")
+
+    loop = asyncio.get_running_loop()
+    events = []
+
+    def on_event(event):
+        # Called on the worker thread; hand the event to the loop thread
+        record = event_record(stack, event)
+        loop.call_soon_threadsafe(emit, record)
+        events.append((time.monotonic(), record))
+
+    kwargs = {"parallel": options.parallel.get(stack, options.default_parallel),
+              "on_event": on_event}
+    targets = stack_targets(stack, options.targets)
+    if targets:
+        kwargs.update(target=targets, target_dependents=options.target_dependents or None)
+    if command == "refresh" and options.preview_only:
+        kwargs["preview_only"] = True
+
+    started = time.monotonic()
+    try:
+        workspace_stack = await asyncio.to_thread(auto.select_stack, stack, work_dir=PROJECT_DIR)
+        result = await asyncio.to_thread(getattr(workspace_stack, command), **kwargs)
+    except auto.CommandError as error:
+        return SimpleNamespace(stack=stack, ok=False, seconds=time.monotonic() - started, changes={},
+                               steps=resource_timings(events), error=(str(error).strip().splitlines() or ["failed"])[-1])
+
+    changes = result.change_summary if command == "preview" else result.summary.resource_changes
+    return SimpleNamespace(stack=stack, ok=True, seconds=time.monotonic() - started,
+                           changes={op.value if hasattr(op, "value") else op: count
+                                    for op, count in (changes or {}).items()},
+                           steps=resource_timings(events), error=None)
+
+
+async def run_stacks(stacks, command, options, emit):
+    tasks = {}
+    for stack in stacks:
+        wait_for = ([tasks[dependency] for dependency in layer_stack_dependencies(stack, stacks)]
+                    if command == "up" else [])
+        tasks[stack] = asyncio.ensure_future(run_stack(stack, command, options, emit, wait_for))
+    return await asyncio.gather(*tasks.values())
+
+
+def order_stacks(stacks):
+    """Order `stacks` so every stack comes after the selected stacks it reads layer outputs from."""
+    ordered = []
+    visiting = set()
+
+    def visit(stack):
+        if stack in ordered:
+            return
+        if stack in visiting:
+            raise ValueError(f"layer_stacks of {stack} form a cycle")
+        visiting.add(stack)
+        for dependency in layer_stack_dependencies(stack, stacks):
+            visit(dependency)
+        visiting.discard(stack)
+        ordered.append(stack)
+
+    for stack in stacks:
+        visit(stack)
+    return ordered
+
+
+def print_report(results, top):
+    print(f"{'stack':<12} {'result':<8} {'seconds':>8}  changes")
+    for result in results:
+        changes = ", ".join(f"{op} {count}" for op, count in sorted(result.changes.items()) if op != "same")
+        print(f"{result.stack:<12} {'ok' if result.ok else 'failed':<8} {result.seconds:>8.1f}  "
+              f"{changes or result.error or 'no changes'}")
+
+    steps = sorted(((result.stack, step) for result in results for step in result.steps),
+                   key=lambda item: item[1].seconds, reverse=True)[:top]
+    if steps:
+        print("\nslowest resource steps:")
+        for stack, step in steps:
+            name = step.urn.split("::")[-1]
+            print(f"  {step.seconds:>7.1f}s  {stack:<12} {step.op:<18} {step.type} {name}"
+                  f"{'  (failed)' if step.failed else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run preview, up or refresh on several stacks concurrently")
+    parser.add_argument("command", choices=("preview", "up", "refresh"))
+    parser.add_argument("--stack", action="append", dest="stacks", metavar="STACK",
+                        help="stack to run, may be repeated (default: every Pulumi.<stack>.yaml)")
+    parser.add_argument("--parallel", action="append", default=[], metavar="N|STACK=N",
+                        help="resource operations a stack runs in parallel, for all stacks or one")
+    parser.add_argument("--target", action="append", default=[], dest="targets", metavar="URN",
+                        help="only operate on this resource URN, may be repeated; "
+                             "a URN applies to the stacks its stack segment matches")
+    parser.add_argument("--target-dependents", action="store_true",
+                        help="also operate on the dependents of the targets")
+    parser.add_argument("--preview-only", action="store_true", help="refresh: only show the differences")
+    parser.add_argument("--events", metavar="FILE", help="stream engine events as JSON lines ('-' for stdout)")
+    parser.add_argument("--top", type=int, default=10, help="slowest resource steps to report")
+    parser.add_argument("--yes", action="store_true",
+                        help="required for up and refresh (unless --preview-only), which change the stacks")
+    args = parser.parse_args()
+
+    if args.preview_only and args.command != "refresh":
+        parser.error("--preview-only only applies to refresh")
+    if args.command != "preview" and not (args.yes or args.preview_only):
+        parser.error(f"{args.command} changes the stacks; pass --yes to go ahead")
+
+    stacks = order_stacks(args.stacks or project_stacks())
+    default_parallel, per_stack_parallel = parse_parallel(args.parallel)
+    options = SimpleNamespace(default_parallel=default_parallel, parallel=per_stack_parallel,
+                              targets=args.targets, target_dependents=args.target_dependents,
+                              preview_only=args.preview_only)
+
+    events_file = None
+    if args.events == "-":
+        events_file = sys.stdout
+    elif args.events:
+        events_file = open(args.events, "w")
+
+    def emit(record):
+        if events_file:
+            events_file.write(json.dumps(record, sort_keys=True) + "\n")
+            events_file.flush()
+
+    try:
+        results = asyncio.run(run_stacks(stacks, args.command, options, emit))
+    finally:
+        if events_file not in (None, sys.stdout):
+            events_file.close()
+
+    print_report(results, args.top)
+    if not all(result.ok for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
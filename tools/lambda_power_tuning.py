@@ -0,0 +1,75 @@
+import argparse
+import importlib
+import statistics
+import time
+import zlib
+
+# Compares the submission Lambda's duration and cost across memory sizes.
+# A handler is timed locally and split into CPU time and waiting time; Lambda
+# allocates CPU in proportion to memory (one full vCPU at 1769 MB), so the CPU
+# part is scaled per memory size while the network waits stay fixed.
+
+FULL_VCPU_MEMORY_MB = 1769
+MEMORY_SIZES_MB = [128, 256, 512, 1024, 1769, 3008]
+# us-east-1 on-demand prices
+PRICE_PER_GB_SECOND = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+PRICE_PER_REQUEST = 0.0000002
+
+
+def stand_in_handler(event, context):
+    # Mimics a submission: download from GitHub, upload to GCS, send an email,
+    # with some CPU work on the downloaded archive in between
+    payload = bytes(range(256)) * (event.get("archive_kb", 512) * 4)
+    time.sleep(event.get("download_s", 0.25))
+    checksum = zlib.crc32(zlib.compress(payload, 6))
+    time.sleep(event.get("upload_s", 0.15))
+    time.sleep(event.get("email_s", 0.1))
+    return {"statusCode": 200, "checksum": checksum}
+
+
+def measure(handler, event, runs):
+    # Median wall time and CPU time of local invocations
+    wall, cpu = [], []
+    for _ in range(runs):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        handler(event, None)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+    return statistics.median(wall), statistics.median(cpu)
+
+
+def project(wall_s, cpu_s, memory_mb, architecture):
+    cpu_share = min(1.0, memory_mb / FULL_VCPU_MEMORY_MB)
+    duration_s = (wall_s - cpu_s) + cpu_s / cpu_share
+    # Billed in 1 ms increments
+    billed_s = max(0.001, round(duration_s, 3))
+    cost = billed_s * memory_mb / 1024 * PRICE_PER_GB_SECOND[architecture] + PRICE_PER_REQUEST
+    return duration_s, cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Project Lambda duration and cost per memory size")
+    parser.add_argument("--handler", help="module:function to time instead of the stand-in handler")
+    parser.add_argument("--architecture", choices=sorted(PRICE_PER_GB_SECOND), default="x86_64")
+    parser.add_argument("--memory", type=int, action="append", help="memory size in MB, may be repeated")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    handler = stand_in_handler
+    if args.handler:
+        module_name, function_name = args.handler.split(":")
+        handler = getattr(importlib.import_module(module_name), function_name)
+
+    wall_s, cpu_s = measure(handler, {}, args.runs)
+    print(f"local: {wall_s * 1000:.0f} ms wall, {cpu_s * 1000:.0f} ms CPU ({args.architecture})")
+    print(f"{'memory MB':>10} {'duration ms':>12} {'cost per 1M invocations':>24}")
+    results = []
+    for memory_mb in sorted(args.memory or MEMORY_SIZES_MB):
+        duration_s, cost = project(wall_s, cpu_s, memory_mb, args.architecture)
+        results.append((cost, memory_mb))
+        print(f"{memory_mb:>10} {duration_s * 1000:>12.0f} {'$' + format(cost * 1_000_000, '.2f'):>24}")
+    print(f"cheapest: {min(results)[1]} MB")
+
+
+if __name__ == "__main__":
+    main()
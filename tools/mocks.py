@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+
+import pulumi
+import yaml
+from pulumi.runtime.mocks import MockMonitor
+from pulumi.runtime.stack import run_pulumi_func
+from pulumi.runtime.sync_await import _sync_await
+
+# Runs the Pulumi program offline against canned provider results. Every
+# resource registration and provider invoke is recorded so callers can check
+# how much work an evaluation of `__main__.py` really does.
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAM = os.path.join(PROJECT_DIR, "__main__.py")
+PROJECT_NAME = "iac-pulumi"
+SECRET_PLACEHOLDER = "mock-secret"
+
+# Canned results for the data sources the program looks up, keyed by invoke token
+INVOKE_RESULTS = {
+    "aws:index/getCallerIdentity:getCallerIdentity": {
+        "accountId": "123456789012",
+        "arn": "arn:aws:iam::123456789012:user/mock",
+        "userId": "AIDAMOCK",
+    },
+    "aws:index/getRegion:getRegion": {"name": "us-east-1", "id": "us-east-1"},
+    "aws:index/getAvailabilityZones:getAvailabilityZones": {
+        "names": ["us-east-1a", "us-east-1b", "us-east-1c", "us-east-1d"],
+        "zoneIds": ["use1-az1", "use1-az2", "use1-az4", "use1-az6"],
+    },
+    "aws:acm/getCertificate:getCertificate": {
+        "arn": "arn:aws:acm:us-east-1:123456789012:certificate/mock",
+        "domain": "dev.webappcloud.me",
+    },
+    "aws:ec2/getAmi:getAmi": {
+        "id": "ami-0123456789abcdef0",
+        "name": "my-custom-ami-mock",
+        "rootDeviceName": "/dev/xvda",
+    },
+}
+
+
+class RecordingMocks(pulumi.runtime.Mocks):
+    def __init__(self, stack_outputs=None):
+        # Stack name -> outputs returned for a StackReference to it
+        self.stack_outputs = stack_outputs or {}
+        self.resources = []
+        self.invokes = []
+        # (type, name) of resources constructed inside an Output.apply callback
+        self.registered_in_apply = []
+        # (type, name) -> registration details as seen by the resource monitor
+        self.registrations = {}
+        # URN -> the same details plus type, name and inputs; unlike (type, name)
+        # the URN stays unique for resources of the same name under different parents
+        self.registrations_by_urn = {}
+        # Arguments of the last new_resource call on each thread; registrations
+        # run concurrently, but each calls new_resource on its own thread
+        self._last_resource = threading.local()
+        # (type, name) -> (type, name) of every resource listed in depends_on
+        self.explicit_dependencies = {}
+        # Seconds spent running the program body ("evaluate_s") and then
+        # waiting for its outstanding Outputs and registrations ("resolve_s")
+        self.timings = {}
+
+    def new_resource(self, args):
+        self.resources.append(args)
+        self._last_resource.args = args
+        if args.typ == "pulumi:pulumi:StackReference":
+            return f"{args.name}-id", {"name": args.name, "outputs": self.stack_outputs.get(args.name, {})}
+        outputs = dict(args.inputs)
+        outputs.setdefault("name", args.name)
+        outputs.setdefault("arn", f"arn:aws:mock::123456789012:{args.name}")
+        if args.typ == "aws:rds/instance:Instance":
+            outputs.setdefault("endpoint", f"{args.name}.mock.rds.amazonaws.com:3306")
+            outputs.setdefault("address", f"{args.name}.mock.rds.amazonaws.com")
+        if args.typ == "aws:rds/cluster:Cluster":
+            outputs.setdefault("endpoint", f"{args.name}.cluster-mock.rds.amazonaws.com")
+            outputs.setdefault("readerEndpoint", f"{args.name}.cluster-ro-mock.rds.amazonaws.com")
+        if args.typ == "aws:cloudfront/distribution:Distribution":
+            outputs.setdefault("domainName", "d111111abcdef8.cloudfront.net")
+            outputs.setdefault("hostedZoneId", "Z2FDTNDATAQYW2")
+        if args.typ == "aws:rds/proxy:Proxy":
+            outputs.setdefault("endpoint", f"{args.name}.proxy-mock.rds.amazonaws.com")
+        if args.typ == "aws:lb/loadBalancer:LoadBalancer":
+            outputs.setdefault("dnsName", f"{args.name}.mock.elb.amazonaws.com")
+            outputs.setdefault("zoneId", "Z35SXDOTRQ7X7K")
+            outputs.setdefault("arnSuffix", f"app/{args.name}/0123456789abcdef")
+        if args.typ == "aws:lb/targetGroup:TargetGroup":
+            outputs.setdefault("arnSuffix", f"targetgroup/{args.name}/0123456789abcdef")
+        if args.typ == "aws:ec2/launchTemplate:LaunchTemplate":
+            outputs.setdefault("latestVersion", 1)
+        if args.typ == "gcp:serviceaccount/account:Account":
+            outputs.setdefault("email", f"{args.name}@mock.iam.gserviceaccount.com")
+        if args.typ == "gcp:serviceaccount/key:Key":
+            outputs.setdefault("privateKey", "e30=")
+        return f"{args.name}-id", outputs
+
+    def call(self, args):
+        self.invokes.append(args)
+        return INVOKE_RESULTS.get(args.token, {})
+
+    def invoke_counts(self):
+        return Counter(invoke.token for invoke in self.invokes)
+
+
+_active_mocks = None
+_apply_depth = 0
+
+
+def _install_apply_tracking():
+    # Resources created inside apply callbacks are invisible to preview and
+    # serialize everything downstream of them, so flag them as they happen.
+    global _apply_depth
+    if getattr(pulumi.Output.apply, "_tracks_registrations", False):
+        return
+
+    original_apply = pulumi.Output.apply
+    original_init = pulumi.Resource.__init__
+
+    def apply(self, func, run_with_unknowns=False):
+        def tracked(value):
+            global _apply_depth
+            _apply_depth += 1
+            try:
+                return func(value)
+            finally:
+                _apply_depth -= 1
+        return original_apply(self, tracked, run_with_unknowns)
+
+    def init(self, t, name, *args, **kwargs):
+        if _active_mocks is not None:
+            if _apply_depth:
+                _active_mocks.registered_in_apply.append((t, name))
+            opts = kwargs.get("opts") or (args[2] if len(args) > 2 else None)
+            depends_on = getattr(opts, "depends_on", None) or []
+            if isinstance(depends_on, pulumi.Resource):
+                depends_on = [depends_on]
+            _active_mocks.explicit_dependencies[(t, name)] = [
+                (dep._type, dep._name) for dep in depends_on if isinstance(dep, pulumi.Resource)
+            ]
+        original_init(self, t, name, *args, **kwargs)
+
+    apply._tracks_registrations = True
+    pulumi.Output.apply = apply
+    pulumi.Resource.__init__ = init
+
+
+class RecordingMonitor(MockMonitor):
+    # Keeps the parent and dependency URNs the engine would receive, which
+    # the plain Mocks interface does not expose.
+    def RegisterResource(self, request):
+        response = super().RegisterResource(request)
+        if request.type != "pulumi:pulumi:Stack":
+            registration = {
+                "urn": response.urn,
+                "parent": request.parent,
+                "custom": request.custom,
+                "dependencies": sorted(request.dependencies),
+                "property_dependencies": {
+                    prop: sorted(deps.urns) for prop, deps in request.propertyDependencies.items()
+                },
+            }
+            self.mocks.registrations[(request.type, request.name)] = registration
+            # MockMonitor has just passed this registration to new_resource on this thread
+            self.mocks.registrations_by_urn[response.urn] = {
+                **registration, "type": request.type, "name": request.name,
+                "inputs": self.mocks._last_resource.args.inputs,
+            }
+        return response
+
+
+def load_stack_config(stack):
+    with open(os.path.join(PROJECT_DIR, f"Pulumi.{stack}.yaml")) as f:
+        stack_file = yaml.safe_load(f)
+
+    config = {}
+    for key, value in stack_file.get("config", {}).items():
+        if ":" not in key:
+            key = f"{PROJECT_NAME}:{key}"
+        if isinstance(value, dict) and "secure" in value:
+            value = SECRET_PLACEHOLDER
+        elif isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        elif isinstance(value, bool):
+            value = str(value).lower()
+        config[key] = str(value)
+    return config
+
+
+def _unload_program_modules():
+    # Helper modules keep per-run state (e.g. the lookup memo), so drop them
+    # to make every run start from a clean import.
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None) or ""
+        if path.startswith(PROJECT_DIR) and not name.startswith("tools"):
+            del sys.modules[name]
+
+
+def run_program(stack="dev", config=None, preview=True, mocks=None):
+    global _active_mocks
+    mocks = mocks or RecordingMocks()
+    _install_apply_tracking()
+    _active_mocks = mocks
+    stack_config = load_stack_config(stack)
+    stack_config.update({k if ":" in k else f"{PROJECT_NAME}:{k}": str(v)
+                         for k, v in (config or {}).items()})
+    # Disk caching would hide invokes from the mocks
+    stack_config.setdefault(f"{PROJECT_NAME}:lookup_cache_ttl", "0")
+
+    pulumi.runtime.set_all_config(stack_config)
+    pulumi.runtime.set_mocks(mocks, project=PROJECT_NAME, stack=stack, preview=preview,
+                             monitor=RecordingMonitor(mocks))
+    _unload_program_modules()
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+
+    started = time.perf_counter()
+
+    def program():
+        runpy.run_path(PROGRAM, run_name="__main__")
+        mocks.timings["evaluate_s"] = time.perf_counter() - started
+
+    _sync_await(run_pulumi_func(program))
+    mocks.timings["resolve_s"] = time.perf_counter() - started - mocks.timings["evaluate_s"]
+    return mocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the program offline under Pulumi mocks")
+    parser.add_argument("--stack", default="dev")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra stack config, may be repeated")
+    parser.add_argument("--stack-outputs", metavar="FILE",
+                        help="JSON file mapping stack names to the outputs StackReferences to them return")
+    args = parser.parse_args()
+
+    stack_outputs = None
+    if args.stack_outputs:
+        with open(args.stack_outputs) as f:
+            stack_outputs = json.load(f)
+    mocks = run_program(args.stack, dict(item.split("=", 1) for item in args.config),
+                        mocks=RecordingMocks(stack_outputs))
+    print(f"resources registered: {len(mocks.resources)}")
+    print(f"provider invokes:     {len(mocks.invokes)}")
+    for token, count in sorted(mocks.invoke_counts().items()):
+        print(f"  {count:3d}  {token}")
+
+    if mocks.registered_in_apply:
+        print("resources registered inside Output.apply callbacks:")
+        for typ, name in mocks.registered_in_apply:
+            print(f"  {typ} {name}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import sys
+
+import pulumi
+
+from tools.mocks import run_program
+
+# Writes a canonical snapshot of the resource graph the program registers
+# under mocks (type, name, resolved inputs, parent and dependencies) and
+# diffs two snapshots, so reviewers can see which resources and properties
+# a change touches without cloud credentials or a full `pulumi preview`.
+#
+# A snapshot is JSON Lines: one resource per line, sorted by its key (its
+# URN without the stack and project, so snapshots of different stacks
+# compare), with sorted object keys. Secrets are replaced by a hash of their
+# value, so snapshots can be shared and still show that a secret changed.
+# Diffing loads both into dicts by key and walks them once, so it stays
+# linear in the number of resources.
+
+SECRET_SIG_KEY = "4dabf18193072939515e22adb298388d"
+SECRET_SIG = "1b47061264138c4ac30d75fd1eb44270"
+UNKNOWN = "<unknown>"
+ROOT_STACK_TYPE = "pulumi:pulumi:Stack"
+
+
+def resource_key(urn):
+    """Return the key of a resource: its URN without the stack and project.
+
+    The parent types stay in the key, so resources with the same type and
+    name under different parents do not collide.
+
+    >>> resource_key("urn:pulumi:dev::iac-pulumi::pulumi:pulumi:Stack$iac-pulumi:layers:Web$aws:lb/listener:Listener::listener")
+    'iac-pulumi:layers:Web$aws:lb/listener:Listener::listener'
+    >>> resource_key("urn:pulumi:dev::iac-pulumi::pulumi:pulumi:Stack::iac-pulumi-dev") is None
+    True
+    """
+    # urn:pulumi:<stack>::<project>::<parent types$...$type>::<name>
+    _, _, qualified_type, name = urn.split("::", 3)
+    if qualified_type == ROOT_STACK_TYPE:
+        return None
+    return f"{qualified_type.removeprefix(ROOT_STACK_TYPE + '$')}::{name}"
+
+
+def canonical(value):
+    """Return `value` as plain JSON data with stable placeholders.
+
+    >>> value = canonical({"port": 3306.0, "ratio": 0.5, "pw": {SECRET_SIG_KEY: SECRET_SIG, "value": "x"}})
+    >>> value["port"], value["ratio"], value["pw"]["<secret>"][:15]
+    (3306, 0.5, 'sha256:ba2df490')
+    """
+    if isinstance(value, dict):
+        if value.get(SECRET_SIG_KEY) == SECRET_SIG:
+            secret = json.dumps(canonical(value.get("value")), sort_keys=True)
+            return {"<secret>": f"sha256:{hashlib.sha256(secret.encode()).hexdigest()}"}
+        return {k: canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, pulumi.AssetArchive):
+        return {"<archive>": {k: canonical(v) for k, v in value.assets.items()}}
+    if isinstance(value, pulumi.StringAsset):
+        return {"<asset>": hashlib.sha256(value.text.encode()).hexdigest()}
+    if isinstance(value, (pulumi.FileAsset, pulumi.FileArchive)):
+        return {"<file>": value.path}
+    if isinstance(value, (pulumi.RemoteAsset, pulumi.RemoteArchive)):
+        return {"<remote>": value.uri}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return UNKNOWN
+
+
+def snapshot(mocks):
+    """Return the registered resources of a mocks run by resource key."""
+    entries = {}
+    for urn, registration in mocks.registrations_by_urn.items():
+        key = resource_key(urn)
+        parent = registration["parent"]
+        entries[key] = {
+            "key": key,
+            "type": registration["type"],
+            "name": registration["name"],
+            "parent": resource_key(parent) if parent else None,
+            "dependencies": sorted(filter(None, map(resource_key, registration["dependencies"]))),
+            "inputs": canonical(registration["inputs"]),
+        }
+    return entries
+
+
+def write(entries, f):
+    for key in sorted(entries):
+        f.write(json.dumps(entries[key], sort_keys=True, separators=(",", ":")))
+        f.write("\n")
+
+
+def load(path):
+    with open(path) as f:
+        return {entry["key"]: entry for entry in map(json.loads, filter(str.strip, f))}
+
+
+def _changed_fields(old, new, prefix=""):
+    # Dotted paths of the fields that differ, descending into objects only
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [(prefix, old, new)] if old != new else []
+    changes = []
+    for field in sorted(old.keys() | new.keys()):
+        changes += _changed_fields(old.get(field), new.get(field), f"{prefix}.{field}" if prefix else field)
+    return changes
+
+
+def diff(old, new):
+    """Return (added, removed, changed) between two snapshots.
+
+    `changed` maps each key present in both to its differing fields as
+    (path, old value, new value).
+
+    >>> a = {"t::x": {"inputs": {"port": 80, "tags": {"Name": "a"}}}, "t::y": {"inputs": {}}}
+    >>> b = {"t::x": {"inputs": {"port": 443, "tags": {"Name": "a"}}}, "t::z": {"inputs": {}}}
+    >>> diff(a, b)
+    (['t::z'], ['t::y'], {'t::x': [('inputs.port', 80, 443)]})
+    """
+    added = sorted(new.keys() - old.keys())
+    removed = sorted(old.keys() - new.keys())
+    changed = {}
+    for key in sorted(old.keys() & new.keys()):
+        if old[key] != new[key]:
+            changed[key] = _changed_fields(old[key], new[key])
+    return added, removed, changed
+
+
+def _show(value, width=100):
+    text = json.dumps(value, sort_keys=True)
+    return text if len(text) <= width else f"{text[:width - 3]}..."
+
+
+def _show_change(old, new, width=100):
+    """Describe one changed field, focused on the part that differs.
+
+    >>> _show_change(["a", "b"], ["b", "c"])
+    '+["c"] -["a"]'
+    >>> _show_change("x" * 200 + "old", "x" * 200 + "new", width=20)
+    '..."xxxxxxxxxxold" => ..."xxxxxxxxxxnew"'
+    """
+    if isinstance(old, list) and isinstance(new, list) and all(isinstance(v, str) for v in old + new):
+        added = [v for v in new if v not in set(old)]
+        removed = [v for v in old if v not in set(new)]
+        if added or removed:
+            return " ".join(filter(None, [added and f"+{_show(added, width)}",
+                                          removed and f"-{_show(removed, width)}"]))
+    if isinstance(old, str) and isinstance(new, str) and max(len(old), len(new)) > width:
+        # Show both strings from a little before their first difference
+        first = next((i for i, (a, b) in enumerate(zip(old, new)) if a != b), min(len(old), len(new)))
+        start = max(0, first - width // 2)
+        prefix = "..." if start else ""
+        return f"{prefix}{_show(old[start:], width)} => {prefix}{_show(new[start:], width)}"
+    return f"{_show(old, width)} => {_show(new, width)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot the resolved resource graph under mocks, or diff two snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    write_parser = commands.add_parser("write", help="evaluate the program and write its snapshot")
+    write_parser.add_argument("--stack", default="dev")
+    write_parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                              help="extra stack config, may be repeated")
+    write_parser.add_argument("-o", "--output", help="snapshot file (default: stdout)")
+    diff_parser = commands.add_parser("diff", help="compare two snapshots; exits 1 when they differ")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "write":
+        entries = snapshot(run_program(args.stack, dict(item.split("=", 1) for item in args.config)))
+        if args.output:
+            with open(args.output, "w") as f:
+                write(entries, f)
+        else:
+            write(entries, sys.stdout)
+        return
+
+    added, removed, changed = diff(load(args.old), load(args.new))
+    for key in added:
+        print(f"+ {key}")
+    for key in removed:
+        print(f"- {key}")
+    for key, fields in changed.items():
+        print(f"~ {key}")
+        for path, old, new in fields:
+            print(f"    {path}: {_show_change(old, new)}")
+    print(f"{len(added)} added, {len(removed)} removed, {len(changed)} changed")
+    if added or removed or changed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
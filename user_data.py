@@ -0,0 +1,152 @@
+import base64
+import shlex
+
+# Boot script for the web instances, rendered from structured pieces: the
+# environment file, readiness checks and named boot phases. Each phase logs
+# its duration to /var/log/webapp-boot.log and CloudWatch (WebApp/Boot
+# PhaseSeconds), so slow boots can be traced to a phase.
+
+BOOT_LOG = "/var/log/webapp-boot.log"
+ENV_FILE = "/etc/webapp.env"
+METRIC_NAMESPACE = "WebApp/Boot"
+
+# Shell helpers shared by every phase
+PREAMBLE = """#!/bin/bash
+set -e
+BOOT_START=$(date +%s)
+PHASE_START=$BOOT_START
+
+phase_done() {
+    local now elapsed
+    now=$(date +%s)
+    elapsed=$((now - PHASE_START))
+    echo "$(date -u +%Y-%m-%dT%H:%M:%SZ) phase=$1 seconds=$elapsed total=$((now - BOOT_START))" | sudo tee -a BOOT_LOG
+    aws cloudwatch put-metric-data --region "$AWS_REGION" --namespace METRIC_NAMESPACE \\
+        --metric-name PhaseSeconds --dimensions "Phase=$1" --value "$elapsed" --unit Seconds || true
+    PHASE_START=$now
+}
+
+wait_for() {
+    local name=$1 deadline
+    shift
+    deadline=$(($(date +%s) + READINESS_TIMEOUT))
+    until "$@" > /dev/null 2>&1; do
+        if [ "$(date +%s)" -ge "$deadline" ]; then
+            echo "$name not ready after ${READINESS_TIMEOUT}s, continuing" | sudo tee -a BOOT_LOG
+            return 0
+        fi
+        sleep 2
+    done
+    echo "$name ready" | sudo tee -a BOOT_LOG
+}
+""".replace("BOOT_LOG", BOOT_LOG).replace("METRIC_NAMESPACE", METRIC_NAMESPACE)
+
+
+def render_env_file(env):
+    """Render KEY=value lines for a systemd EnvironmentFile.
+
+    >>> print(render_env_file({"DB_HOST": "db.local", "DB_NAME": "csye6225"}), end="")
+    DB_HOST=db.local
+    DB_NAME=csye6225
+    """
+    return "".join(f"{key}={value}\n" for key, value in env.items())
+
+
+def _write_file_atomically(path, content, mode="600"):
+    # Write next to the target and rename over it in one step
+    encoded = base64.b64encode(content.encode("utf-8")).decode("utf-8")
+    tmp_path = shlex.quote(f"{path}.tmp")
+    return [
+        f"echo {encoded} | base64 -d | sudo tee {tmp_path} > /dev/null",
+        f"sudo chmod {mode} {tmp_path}",
+        f"sudo mv -f {tmp_path} {shlex.quote(path)}",
+    ]
+
+
+def tcp_check(host, port):
+    return f"timeout 3 bash -c {shlex.quote(f'</dev/tcp/{host}/{port}')}"
+
+
+def lifecycle_hook_phase(region, group_name, hook_name):
+    # A service rather than a boot script: instances leaving a Running or
+    # Hibernated warm pool do not boot again, so it polls the instance's
+    # target lifecycle state (Warmed:* on launch into the pool, InService when
+    # it leaves it) and completes the launch hook once for each new state
+    script = f"""#!/bin/bash
+IMDS=http://169.254.169.254/latest
+COMPLETED_FILE=/run/webapp-lifecycle-state
+while true; do
+    TOKEN=$(curl -s -X PUT "$IMDS/api/token" -H "X-aws-ec2-metadata-token-ttl-seconds: 60")
+    STATE=$(curl -sf -H "X-aws-ec2-metadata-token: $TOKEN" "$IMDS/meta-data/autoscaling/target-lifecycle-state")
+    case "$STATE" in
+        InService|Warmed:*)
+            if [ "$STATE" != "$(cat "$COMPLETED_FILE" 2>/dev/null)" ]; then
+                INSTANCE_ID=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" "$IMDS/meta-data/instance-id")
+                if aws autoscaling complete-lifecycle-action --region {region} \\
+                        --auto-scaling-group-name {group_name} \\
+                        --lifecycle-hook-name {hook_name} \\
+                        --lifecycle-action-result CONTINUE \\
+                        --instance-id "$INSTANCE_ID"; then
+                    echo "$STATE" > "$COMPLETED_FILE"
+                fi
+            fi
+            ;;
+    esac
+    sleep 5
+done
+"""
+    unit = """[Unit]
+Description=Complete the webapp launch lifecycle hook
+After=webapp.service
+
+[Service]
+ExecStart=/usr/local/bin/complete-lifecycle-hook.sh
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+"""
+    return ("lifecycle_hook",
+            _write_file_atomically("/usr/local/bin/complete-lifecycle-hook.sh", script, mode="755") +
+            _write_file_atomically("/etc/systemd/system/webapp-lifecycle-hook.service", unit, mode="644") +
+            ["sudo systemctl daemon-reload",
+             "sudo systemctl enable --now webapp-lifecycle-hook.service"])
+
+
+def render_boot_script(env, region, readiness_checks=(), log_keys=(),
+                       readiness_timeout=300, extra_phases=()):
+    """Render the instance boot script.
+
+    `env` is written to /etc/webapp.env, `readiness_checks` are (name, shell
+    command) pairs polled until they succeed or `readiness_timeout` seconds
+    pass, and `log_keys` are the env keys safe to echo to the user data log.
+    """
+    phases = [
+        ("environment",
+         _write_file_atomically(ENV_FILE, render_env_file(env)) +
+         [f"echo {shlex.quote(f'{key}={env[key]}')} | sudo tee -a /var/log/userdata.log"
+          for key in log_keys]),
+        ("cloudwatch_agent", [
+            "sudo /opt/aws/amazon-cloudwatch-agent/bin/amazon-cloudwatch-agent-ctl -a fetch-config -m ec2 -s "
+            "-c file:/opt/webapp/cloudwatch-agent-config.json",
+            "sudo mv /opt/webapp/cloudwatch-agent-config.json /opt/cloudwatch-config.json",
+        ]),
+        ("readiness", [f"wait_for {shlex.quote(name)} {command}" for name, command in readiness_checks]),
+        ("webapp_start", [
+            "sudo systemctl daemon-reload",
+            "sudo systemctl enable webapp.service",
+            "sudo systemctl start webapp.service",
+        ]),
+        *extra_phases,
+    ]
+
+    lines = [PREAMBLE,
+             f"AWS_REGION={shlex.quote(region)}",
+             f"READINESS_TIMEOUT={int(readiness_timeout)}",
+             'echo "User data script started to execute" | sudo tee -a /var/log/cloud-init-output.log']
+    for name, commands in phases:
+        lines.append(f"\n# Phase: {name}")
+        lines.extend(commands)
+        lines.append(f"phase_done {name}")
+    lines.append('\necho "User data script completed the execution" | sudo tee -a /var/log/cloud-init-output.log')
+    return "\n".join(lines) + "\n"